@@ -0,0 +1,173 @@
+"""
+Analysis Cache - Byte-budgeted LRU cache of per-file analysis results
+Lets TextProcessor serve tokens, counts and frequencies without re-reading or re-tokenizing files
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Hashable, List, Tuple
+
+# Default memory budget of one cache
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class CachedAnalysis:
+    """Text, kept tokens and token frequencies of one analyzed file."""
+
+    __slots__ = ("text", "tokens", "frequencies", "nbytes")
+
+    def __init__(self, text: str, tokens: List[str], frequencies: Counter):
+        self.text = text
+        self.tokens = tokens
+        self.frequencies = frequencies
+        # Rough footprint: the text, one pointer plus a small str per token,
+        # and a dict slot per distinct token
+        self.nbytes = sys.getsizeof(text) + 60 * len(tokens) + 100 * len(frequencies)
+
+
+class AnalysisCache:
+    """
+    LRU cache of file analyses, keyed by content hash and bounded by bytes.
+
+    Each file path maps to the (mtime, size) stamp and content hash seen
+    when it was last analyzed, so a cache hit costs one stat() call and no
+    read. A changed stamp triggers a re-read; if the content hash is
+    unchanged (or another file has identical content) the stored analysis
+    is reused without tokenizing again.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes: Approximate memory budget; least recently used
+                analyses are evicted beyond it (0 disables caching)
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._clear()
+
+    def get_or_analyze(self, file_path: str, variant: Hashable,
+                       analyze_text: Callable[[str], CachedAnalysis]) -> CachedAnalysis:
+        """
+        Get the analysis of a file, computing it if it isn't cached.
+
+        Args:
+            file_path: Path to a UTF-8 text file
+            variant: Key for the analysis settings (e.g. stopword set and
+                whether stopwords are removed)
+            analyze_text: Function that analyzes the file's text
+
+        Returns:
+            Cached or freshly computed analysis
+        """
+        path = os.path.abspath(file_path)
+        stamp = self._stamp(path)
+
+        with self._lock:
+            known = self._paths.get(path)
+            if known is not None and known[0] == stamp:
+                entry = self._entries.get((known[1], variant))
+                if entry is not None:
+                    self._entries.move_to_end((known[1], variant))
+                    self.hits += 1
+                    return entry
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+
+        with self._lock:
+            entry = self._entries.get((digest, variant))
+            if entry is not None:
+                self._entries.move_to_end((digest, variant))
+                self._remember_path(path, stamp, digest)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Decode like open(..., "r", encoding="utf-8") does, universal newlines included
+        text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        del data
+        entry = analyze_text(text)
+
+        with self._lock:
+            if self._store((digest, variant), entry):
+                self._remember_path(path, stamp, digest)
+
+        return entry
+
+    def clear(self) -> None:
+        """Drop every cached analysis."""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and current memory use."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def __getstate__(self):
+        # Copies sent to worker processes start empty
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_bytes"])
+
+    def _store(self, key: Tuple[bytes, Hashable], entry: CachedAnalysis) -> bool:
+        """Insert an entry, evicting old ones to stay in budget; False if it doesn't fit."""
+        if entry.nbytes > self.max_bytes:
+            return False
+
+        if key in self._entries:
+            self._discard(key)
+
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+        self._digest_refs[key[0]] += 1
+
+        while self._bytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+
+        return True
+
+    def _discard(self, key: Tuple[bytes, Hashable]) -> None:
+        """Remove an entry, forgetting paths whose content no longer has any entries."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+
+        digest = key[0]
+        self._digest_refs[digest] -= 1
+        if self._digest_refs[digest] <= 0:
+            del self._digest_refs[digest]
+            for path in self._digest_paths.pop(digest, ()):
+                if self._paths.get(path, (None, None))[1] == digest:
+                    del self._paths[path]
+
+    def _remember_path(self, path: str, stamp: Tuple[int, int], digest: bytes) -> None:
+        self._paths[path] = (stamp, digest)
+        self._digest_paths.setdefault(digest, set()).add(path)
+
+    def _clear(self) -> None:
+        self._paths: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+        self._digest_paths: Dict[bytes, set] = {}
+        self._digest_refs: Counter = Counter()
+        self._entries: "OrderedDict[Tuple[bytes, Hashable], CachedAnalysis]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,42 @@
+"""
+Atomic Write - Replace JSON files atomically with consistent permissions
+Shared by every module that persists state, so readers never see a partial file
+"""
+
+import json
+import os
+import secrets
+from typing import Any
+
+
+def write_json(path: str, data: Any, **options: Any) -> None:
+    """
+    Write data to a JSON file atomically (temp file + rename).
+
+    A crash mid-write leaves the previous file intact. An existing file
+    keeps its permissions; a new one gets those of open() (0666 minus the
+    umask), unlike the 0600 of tempfile.mkstemp.
+
+    Args:
+        path: File to write
+        data: JSON-serializable data
+        **options: Extra json.dump() options (e.g. indent, ensure_ascii)
+    """
+    path = os.path.abspath(path)
+    directory, name = os.path.split(path)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = None
+
+    tmp_path = os.path.join(directory, f".{name}-{secrets.token_hex(8)}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **options)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,447 @@
+"""
+Benchmarks for the CustomStopwords plugin and the processing pipeline
+Run this file to measure throughput of the hot paths on synthetic documents
+"""
+
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from custom_stopwords import CustomStopwords, analyze, preprocess
+from nlp_pipeline import NLPPipeline
+from stoppatterns import PatternMatcher, normalize_pattern, pattern_regex
+from stopphrases import PhraseMatcher
+from stopword_store import StopwordStore
+from token_counts import BACKENDS, DEFAULT_BACKEND, count_ids, document_term_matrix
+from tokenization import TokenizerRegistry
+
+
+SAMPLE_WORDS = [
+    "the", "api", "client", "sends", "a", "request", "to", "server", "and",
+    "it", "returns", "response", "with", "data", "for", "each", "user",
+    "processing", "pipeline", "document", "analysis", "of", "in", "is",
+    "market", "revenue", "strategy", "research", "study", "results", "this",
+]
+
+
+def _sample_text(size_bytes: int, seed: int = 0) -> str:
+    """Build a pseudo-random English-like document of roughly size_bytes."""
+    rng = random.Random(seed)
+    words = []
+    total = 0
+    while total < size_bytes:
+        word = rng.choice(SAMPLE_WORDS)
+        if rng.random() < 0.1:
+            word = word.capitalize() + "."
+        words.append(word)
+        total += len(word) + 1
+    return " ".join(words)
+
+
+CODE_WORDS = [
+    "def", "self", "return", "if", "else", "for", "in", "import", "class", "None",
+    "value", "result", "items", "config", "get", "set", "len", "range", "print", "True",
+]
+
+UNICODE_WORDS = [
+    "données", "résumé", "naïve", "straße", "größe", "Ελληνικά", "λόγος", "ΣΟΦΙΑ",
+    "русский", "текст", "日本語", "テキスト", "the", "and", "café", "İstanbul",
+]
+
+
+def _code_text(size_bytes: int, seed: int = 0) -> str:
+    """Build pseudo-random Python-like source of roughly size_bytes."""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size_bytes:
+        name, attr, call = (rng.choice(CODE_WORDS) for _ in range(3))
+        line = rng.choice([
+            f"    {name}_{attr} = self.{call}({attr}, key='{name}')",
+            f"    if {name}[{rng.randint(0, 99)}] >= {attr}.{call}():",
+            f"        return [{name} for {name} in {attr} if {name} != None]  # {call}",
+        ])
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def _unicode_text(size_bytes: int, seed: int = 0) -> str:
+    """Build a pseudo-random multilingual document of roughly size_bytes."""
+    rng = random.Random(seed)
+    words = []
+    total = 0
+    while total < size_bytes:
+        word = rng.choice(UNICODE_WORDS) + rng.choice(["", "", ",", ".", "—"])
+        words.append(word)
+        total += len(word.encode("utf-8")) + 1
+    return " ".join(words)
+
+
+def _best_time(func, repeat: int = 3) -> float:
+    """Return the best wall-clock time of several runs of func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_stopword_lookup(size_bytes: int = 2_000_000):
+    """Benchmark 1: per-token set union vs precomputed frozen lookup"""
+    print("=" * 60)
+    print("BENCHMARK 1: Stopword Lookup (tokens per second)")
+    print("=" * 60)
+
+    stopwords = CustomStopwords()
+    text = _sample_text(size_bytes)
+    token_count = len(preprocess(text, stopwords, remove_stopwords=False))
+
+    def per_call_union():
+        # Previous behaviour: is_stopword() rebuilt base | custom per token
+        words = preprocess(text, stopwords, remove_stopwords=False)
+        return [
+            word for word in words
+            if word.lower() not in stopwords.base_stopwords.union(stopwords.custom_stopwords)
+        ]
+
+    def frozen_lookup():
+        return preprocess(text, stopwords, remove_stopwords=True)
+
+    assert per_call_union() == frozen_lookup()
+
+    before = _best_time(per_call_union)
+    after = _best_time(frozen_lookup)
+
+    print(f"Document size: {size_bytes / 1_000_000:.1f} MB, {token_count} tokens")
+    print(f"  Per-call union:  {token_count / before:>14,.0f} tokens/s")
+    print(f"  Frozen lookup:   {token_count / after:>14,.0f} tokens/s")
+    print(f"  Speedup:         {before / after:>14.1f}x")
+    print()
+
+
+def benchmark_parallel_directory(file_count: int = 200, file_bytes: int = 100_000):
+    """Benchmark 2: process_directory throughput across worker counts"""
+    print("=" * 60)
+    print("BENCHMARK 2: Parallel Directory Processing (files per second)")
+    print("=" * 60)
+
+    directory = tempfile.mkdtemp(prefix="nlp-bench-")
+    try:
+        for i in range(file_count):
+            with open(os.path.join(directory, f"doc_{i:05d}.txt"), "w", encoding="utf-8") as f:
+                f.write(_sample_text(file_bytes, seed=i))
+
+        print(f"{file_count} files of {file_bytes // 1000} KB on {os.cpu_count()} CPUs")
+        baseline = None
+        for workers in (1, 2, 4, 8):
+            pipeline = NLPPipeline()
+            pipeline.get_processor(pipeline.default_type)
+            elapsed = _best_time(lambda: pipeline.process_directory(
+                directory, workers=workers, chunksize=8), repeat=1)
+            baseline = baseline or elapsed
+            print(f"  workers={workers}:  {file_count / elapsed:>10,.1f} files/s  "
+                  f"({baseline / elapsed:.1f}x)")
+    finally:
+        shutil.rmtree(directory)
+    print()
+
+
+def benchmark_fused_analysis(size_bytes: int = 1_000_000):
+    """Benchmark 3: multi-pass process_text statistics vs fused analyze()"""
+    print("=" * 60)
+    print("BENCHMARK 3: Fused Single-Pass Analysis")
+    print("=" * 60)
+
+    stopwords = CustomStopwords()
+    text = _sample_text(size_bytes)
+
+    def multi_pass():
+        # Previous NLPPipeline.process_text: lower + findall + per-token
+        # is_stopword, set(tokens), and text.split() twice for the reduction
+        words = re.findall(r'\b\w+\b', text.lower())
+        tokens = [word for word in words if not stopwords.is_stopword(word)]
+        unique = len(set(tokens))
+        reduction = (1 - len(tokens) / len(text.split())) if text.split() else 0
+        return tokens, unique, reduction
+
+    def fused():
+        return analyze(text, stopwords)
+
+    assert multi_pass()[0] == fused().tokens
+
+    before = _best_time(multi_pass, repeat=5)
+    after = _best_time(fused, repeat=5)
+    speedup = before / after
+
+    print(f"Document size: {size_bytes / 1_000_000:.1f} MB")
+    print(f"  Multi-pass:  {before * 1000:>8.1f} ms")
+    print(f"  Fused:       {after * 1000:>8.1f} ms")
+    print(f"  Speedup:     {speedup:>8.1f}x  ({'meets' if speedup >= 2 else 'MISSES'} the 2x target)")
+    print()
+
+
+def benchmark_token_ids(document_count: int = 200, document_bytes: int = 20_000):
+    """Benchmark 4: memory of retained results with string tokens vs token IDs"""
+    print("=" * 60)
+    print("BENCHMARK 4: Retained Result Memory (tokens vs token IDs)")
+    print("=" * 60)
+
+    texts = [_sample_text(document_bytes, seed=i) for i in range(document_count)]
+
+    def retained_bytes(as_ids: bool) -> int:
+        pipeline = NLPPipeline()
+        pipeline.get_processor(pipeline.default_type)
+        pipeline.process_text(texts[0], as_ids=as_ids)
+        pipeline.reset()
+
+        tracemalloc.start()
+        for text in texts:
+            pipeline.process_text(text, as_ids=as_ids)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    before = retained_bytes(as_ids=False)
+    after = retained_bytes(as_ids=True)
+
+    print(f"{document_count} documents of {document_bytes // 1000} KB retained")
+    print(f"  Token strings:  {before / 1_000_000:>8.2f} MB")
+    print(f"  Token IDs:      {after / 1_000_000:>8.2f} MB")
+    print(f"  Reduction:      {before / after:>8.1f}x")
+    print()
+
+
+def benchmark_counting_backends(size_bytes: int = 2_000_000, document_count: int = 500):
+    """Benchmark 5: counting token IDs with the Python and NumPy backends"""
+    print("=" * 60)
+    print("BENCHMARK 5: Token-ID Counting Backends")
+    print("=" * 60)
+
+    if DEFAULT_BACKEND != "numpy":
+        print("NumPy is not installed; only the Python backend is available")
+        print()
+        return
+
+    pipeline = NLPPipeline(retention="none")
+    token_ids = pipeline.process_text(_sample_text(size_bytes), as_ids=True)["token_ids"]
+    documents = [pipeline.process_text(_sample_text(20_000, seed=i), as_ids=True)["token_ids"]
+                 for i in range(document_count)]
+
+    print(f"Top-10 of {len(token_ids)} IDs, and a DTM of {document_count} documents")
+    for backend in BACKENDS:
+        top = _best_time(lambda: count_ids(token_ids, pipeline.vocabulary, True, backend)[1].most_common(10))
+        dtm = _best_time(lambda: document_term_matrix(documents, pipeline.vocabulary, backend))
+        print(f"  {backend:<7} top-10: {top * 1000:>7.1f} ms   DTM: {dtm * 1000:>7.1f} ms")
+    print()
+
+
+def benchmark_build_dtm(document_count: int = 4000, document_bytes: int = 10_000):
+    """Benchmark 6: corpus vectorization with build_dtm across worker counts"""
+    print("=" * 60)
+    print("BENCHMARK 6: Sparse Document-Term Matrix (documents per second)")
+    print("=" * 60)
+
+    texts = [_sample_text(document_bytes, seed=i) for i in range(document_count)]
+
+    print(f"{document_count} documents of {document_bytes // 1000} KB on {os.cpu_count()} CPUs")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        pipeline = NLPPipeline()
+        elapsed = _best_time(lambda: pipeline.build_dtm(texts, workers=workers), repeat=1)
+        baseline = baseline or elapsed
+        print(f"  workers={workers}:  {document_count / elapsed:>10,.1f} docs/s  "
+              f"({baseline / elapsed:.1f}x)")
+    print()
+
+
+def benchmark_tokenizers(size_bytes: int = 1_000_000):
+    """Benchmark 7: tokenizers on English, code-heavy and Unicode-heavy text"""
+    print("=" * 60)
+    print("BENCHMARK 7: Tokenizers (MB per second)")
+    print("=" * 60)
+
+    corpora = {
+        "English": _sample_text(size_bytes),
+        "Code": _code_text(size_bytes),
+        "Unicode": _unicode_text(size_bytes),
+    }
+    tokenizers = {
+        "uncompiled re": lambda text: re.findall(r'\b\w+\b', text.lower()),
+        **{name: TokenizerRegistry.get_tokenizer(name).tokenize for name in ("regex", "default", "ascii")},
+    }
+
+    print(f"{'':<16}" + "".join(f"{corpus:>12}" for corpus in corpora))
+    for name, tokenize in tokenizers.items():
+        cells = []
+        for text in corpora.values():
+            # The ASCII tokenizer only promises the regex's words on ASCII text
+            exact = tokenize(text) == tokenizers["uncompiled re"](text)
+            elapsed = _best_time(lambda: tokenize(text))
+            cells.append(f"{len(text.encode('utf-8')) / elapsed / 1_000_000:>10.1f}{' ' if exact else '*'} ")
+        print(f"  {name:<14}" + "".join(cells))
+    print("  (* tokens differ from the word regex)")
+    print()
+
+
+def benchmark_startup(repeat: int = 5):
+    """Benchmark 8: cold start of a fresh process up to its first processed text"""
+    print("=" * 60)
+    print("BENCHMARK 8: Processor Startup (fresh interpreter, best of {})".format(repeat))
+    print("=" * 60)
+
+    temp_dir = tempfile.mkdtemp(prefix="nlp_bench_")
+    snapshot_path = os.path.join(temp_dir, "stopwords_snapshot.json")
+    try:
+        StopwordStore.write_snapshot(snapshot_path, ["english"])
+
+        startup = (
+            "from stopword_store import StopwordStore; StopwordStore.use_snapshot({!r}); "
+            "from custom_stopwords import preprocess; from document_processors import ProcessorRegistry; "
+            "preprocess('the api returns data', ProcessorRegistry.get_processor('technical').stopwords_plugin)"
+        )
+        variants = {
+            "interpreter only": "pass",
+            "eager NLTK import": "import nltk.corpus; " + startup.format(None),
+            "lazy NLTK": startup.format(None),
+            "bundled snapshot": startup.format(snapshot_path),
+        }
+
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            filter(None, [os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")])))
+        for name, code in variants.items():
+            elapsed = _best_time(lambda: subprocess.run([sys.executable, "-c", code], env=env, check=True),
+                                 repeat=repeat)
+            print(f"  {name:<18} {elapsed * 1000:>8.1f} ms")
+    finally:
+        shutil.rmtree(temp_dir)
+    print()
+
+
+def benchmark_stopphrases(size_bytes: int = 1_000_000):
+    """Benchmark 9: per-phrase scans vs one Aho-Corasick pass over the words"""
+    print("=" * 60)
+    print("BENCHMARK 9: Stopphrase Removal (MB per second)")
+    print("=" * 60)
+
+    text = _sample_text(size_bytes)
+    words = TokenizerRegistry.get_tokenizer("default").tokenize(text)
+    rng = random.Random(9)
+
+    print(f"Document size: {size_bytes / 1_000_000:.1f} MB, {len(words)} words")
+    print(f"  {'phrases':>8}  {'per-phrase scan':>16}  {'automaton':>10}")
+    for phrase_count in (1, 10, 100, 1000):
+        phrases = {" ".join(rng.sample(SAMPLE_WORDS, rng.randint(2, 3))) for _ in range(phrase_count)}
+        matcher = PhraseMatcher(phrases)
+
+        def per_phrase_scan():
+            # One replace over the whole joined text per phrase
+            joined = f" {' '.join(words)} "
+            for phrase in phrases:
+                joined = joined.replace(f" {phrase} ", " ")
+            return joined.split()
+
+        scan = _best_time(per_phrase_scan)
+        automaton = _best_time(lambda: matcher.remove(words))
+        print(f"  {len(phrases):>8}  {size_bytes / scan / 1_000_000:>16.1f}  "
+              f"{size_bytes / automaton / 1_000_000:>10.1f}")
+    print()
+
+
+def benchmark_stop_patterns(size_bytes: int = 2_000_000):
+    """Benchmark 10: per-token pattern checks vs one memoized combined regex"""
+    print("=" * 60)
+    print("BENCHMARK 10: Stop Patterns (tokens per second)")
+    print("=" * 60)
+
+    stopwords = CustomStopwords()
+    lookup = stopwords.get_all()
+    rng = random.Random(10)
+    # Add URLs, numbers, hashes and temporary identifiers to the sample vocabulary
+    noise = [f"http{rng.randint(0, 99)}" for _ in range(50)] + [str(rng.randint(0, 10 ** 6)) for _ in range(500)]
+    noise += [f"{rng.getrandbits(64):016x}" for _ in range(200)] + [f"tmp_{i}" for i in range(50)]
+    words = [rng.choice(noise) if rng.random() < 0.2 else word
+             for word in preprocess(_sample_text(size_bytes), stopwords, remove_stopwords=False)]
+    candidates = [word for word in words if word not in lookup]
+    patterns = [normalize_pattern(pattern) for pattern in ("http*", "tmp_*", "re:[0-9]+", "re:[0-9a-f]{16,}")]
+
+    regexes = [re.compile(pattern_regex(pattern)) for pattern in patterns]
+
+    def per_pattern_regex():
+        return [word for word in candidates if not any(regex.fullmatch(word) for regex in regexes)]
+
+    def memoized_matcher():
+        # A fresh matcher each run, so the memo is filled as part of the timing
+        return PatternMatcher(patterns).remove(candidates)
+
+    assert per_pattern_regex() == memoized_matcher()
+
+    before = _best_time(per_pattern_regex)
+    after = _best_time(memoized_matcher)
+
+    print(f"{len(words)} tokens, {len(candidates)} exact misses, {len(set(candidates))} distinct")
+    print(f"  Per-pattern regex:  {len(words) / before:>14,.0f} tokens/s")
+    print(f"  Memoized matcher:   {len(words) / after:>14,.0f} tokens/s")
+    print(f"  Speedup:            {before / after:>14.1f}x")
+    print()
+
+
+def benchmark_decision_cache(size_bytes: int = 2_000_000):
+    """Benchmark 11: per-occurrence stopword checks vs cached filter decisions"""
+    print("=" * 60)
+    print("BENCHMARK 11: Filter Decision Cache (tokens per second)")
+    print("=" * 60)
+
+    rng = random.Random(11)
+    # Mixed-case tokens, as produced by tokenizers that don't lowercase
+    tokens = [word.capitalize() if rng.random() < 0.3 else word
+              for word in re.findall(r"\w+", _sample_text(size_bytes))]
+    uncached = CustomStopwords(decision_cache_size=0)
+    cached = CustomStopwords()
+
+    def per_occurrence():
+        return [token.lower() for token in tokens if not uncached.is_stopword(token)]
+
+    def cached_checks():
+        return [token.lower() for token in tokens if not cached.is_stopword(token)]
+
+    def batch_filter():
+        return cached.filter_tokens(tokens)
+
+    assert per_occurrence() == cached_checks() == batch_filter()
+
+    baseline = _best_time(per_occurrence)
+    print(f"{len(tokens)} tokens, {len(set(tokens))} distinct")
+    print(f"  Uncached is_stopword:   {len(tokens) / baseline:>14,.0f} tokens/s")
+    for name, func in (("Cached is_stopword:", cached_checks), ("filter_tokens():", batch_filter)):
+        elapsed = _best_time(func)
+        print(f"  {name:<22} {len(tokens) / elapsed:>14,.0f} tokens/s  ({baseline / elapsed:.1f}x)")
+    stats = cached.decision_cache.stats()
+    print(f"  Cache: {stats['hits']:,} hits, {stats['misses']:,} misses, {stats['entries']} entries")
+    print()
+
+
+def main():
+    """Run all benchmarks"""
+    benchmark_stopword_lookup()
+    benchmark_parallel_directory()
+    benchmark_fused_analysis()
+    benchmark_token_ids()
+    benchmark_counting_backends()
+    benchmark_build_dtm()
+    benchmark_tokenizers()
+    benchmark_startup()
+    benchmark_stopphrases()
+    benchmark_stop_patterns()
+    benchmark_decision_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,79 @@
 import json
 import os
-import re
-from nltk.corpus import stopwords
-from typing import List, Set, Union
+import threading
+import weakref
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from itertools import filterfalse
+from typing import (Collection, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO,
+                    Tuple, Union)
+from atomic_write import write_json
+from stopword_store import SECTIONS_KEY, STOPPATTERNS_KEY, STOPPHRASES_KEY, StopwordStore
+from stopphrases import PhraseMatcher, compile_phrases, normalize_phrase
+from stoppatterns import PatternMatcher, compile_patterns, normalize_pattern
+from decision_cache import DEFAULT_MAX_SIZE as DEFAULT_DECISION_CACHE_SIZE, DecisionCache
+from vocabulary import Vocabulary
+from token_counts import IdFrequencies, resolve_backend, unique_ids
+from tokenization import DEFAULT_TOKENIZER, WORD_PATTERN, Tokenizer
+
+# Characters read from a stream per chunk in streaming mode
+DEFAULT_CHUNK_SIZE = 1 << 20
 
 
 class CustomStopwords:
     """
     Plugin for managing custom stopwords in NLTK.
     Allows adding, removing, and checking stopwords for text processing.
+
+    Stopwords are composed from three layers: the base NLTK list, the
+    custom words persisted in storage, and an in-memory overlay (e.g. the
+    domain terms of a document type) that is never saved.
+
+    Custom stopphrases (multi-word stopwords such as "according to") are
+    persisted next to the custom words and removed before single-word
+    filtering. Custom stop patterns (e.g. "http*") are persisted too and
+    checked only for words that are not exact stopwords.
     """
 
-    def __init__(self, language: str = "english", storage_path: str = "custom_stopwords.json"):
+    def __init__(self, language: str = "english", storage_path: str = "custom_stopwords.json",
+                 defer_save: bool = False, flush_interval: Optional[float] = None,
+                 overlay: Optional[Iterable[str]] = None,
+                 decision_cache_size: int = DEFAULT_DECISION_CACHE_SIZE):
         """
         Initialize the CustomStopwords plugin.
         
         Args:
             language: Language for stopwords (default: "english")
             storage_path: Path to JSON file storing custom stopwords
+            defer_save: Keep add/remove changes in memory until flush() is called
+            flush_interval: With deferred saving, also flush automatically this
+                many seconds after the first unsaved change (default: never).
+                Pending changes are always written when the instance is
+                closed, garbage collected or the interpreter exits
+            overlay: Extra in-memory stopwords (e.g. domain terms) that are
+                never written to storage
+            decision_cache_size: Distinct tokens whose keep/drop decision
+                is_stopword() and filter_tokens() remember (0 disables the cache)
         """
         self.language = language
         self.storage_path = storage_path
+        self.overlay_stopwords: FrozenSet[str] = frozenset(word.lower() for word in overlay or ())
+        self.defer_save = defer_save
+        self.flush_interval = flush_interval
+        # Layers with changes not yet written, shared with the finalizer so
+        # that they are saved even if flush() is never called
+        self._unsaved: Dict[str, Collection[str]] = {}
+        self._batch_depth = 0
+        # Mutable copy of the custom stopwords that add/remove inside a batch
+        # update in place; frozen again when the custom stopwords are next read
+        self._staged: Optional[Set[str]] = None
+        # Guards _unsaved against the flush_interval timer's thread
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # Bumped on every change to the stopwords; cached decisions of older versions are dropped
+        self.version = 0
+        self.decision_cache = DecisionCache(decision_cache_size)
 
         if not os.path.exists(self.storage_path):
             self._initialize_storage()
@@ -33,12 +86,72 @@ class CustomStopwords:
             json.dump({}, f)
 
     def _load_custom_stopwords(self):
-        """Load custom and base stopwords from storage and NLTK."""
-        with open(self.storage_path, "r") as f:
-            data = json.load(f)
+        """Load custom and base stopwords from the shared StopwordStore."""
+        StopwordStore.acquire(self.storage_path)
+        self._finalizer = weakref.finalize(self, _release, self.storage_path, self.language, self._unsaved)
+
+        # Both sets are shared with other instances; add/remove replace them
+        # with new frozensets instead of mutating them (copy-on-write)
+        self._custom: FrozenSet[str] = StopwordStore.custom_stopwords(self.storage_path, self.language)
+        self.base_stopwords: FrozenSet[str] = StopwordStore.base_stopwords(self.language)
+        self.custom_stopphrases: FrozenSet[str] = StopwordStore.custom_stopphrases(self.storage_path,
+                                                                                  self.language)
+        self.custom_stoppatterns: FrozenSet[str] = StopwordStore.custom_stoppatterns(self.storage_path,
+                                                                                    self.language)
+        self._invalidate_lookup()
+
+    @property
+    def custom_stopwords(self) -> FrozenSet[str]:
+        """The custom stopwords, as a shared frozen set; assigning to it works like add/remove."""
+        self._freeze_staged()
+        return self._custom
+
+    @custom_stopwords.setter
+    def custom_stopwords(self, words: Iterable[str]) -> None:
+        self._custom = frozenset(words)
+        self._staged = None
+        self._invalidate_lookup()
+        self._mark_dirty()
+
+    def _freeze_staged(self) -> None:
+        """Turn the custom stopwords staged by a batch back into a shared frozen set."""
+        if self._staged is not None:
+            self._custom = frozenset(self._staged)
+            self._staged = None
+
+    def _invalidate_lookup(self) -> None:
+        """Mark the merged lookup set stale after a change; get_all() rebuilds it when next needed."""
+        self.version += 1
+        self._lookup: Optional[FrozenSet[str]] = None
+
+    def layers(self) -> List[Tuple[str, FrozenSet[str]]]:
+        """Get the stopword layers in stacking order as (name, words) pairs."""
+        return [
+            ("base", self.base_stopwords),
+            ("custom", self.custom_stopwords),
+            ("overlay", self.overlay_stopwords),
+        ]
+
+    def close(self) -> None:
+        """Flush pending changes and release this instance's reference to the shared store."""
+        self.flush()
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __getstate__(self):
+        # Pickled copies (e.g. sent to worker processes) carry their stopword
+        # sets but no store reference or unsaved changes of their own
+        self._freeze_staged()
+        state = self.__dict__.copy()
+        state["_finalizer"] = None
+        state["_unsaved"] = {}
+        state["_flush_lock"] = None
+        state["_timer"] = None
+        return state
 
-        self.custom_stopwords: Set[str] = set(data.get(self.language, []))
-        self.base_stopwords: Set[str] = set(stopwords.words(self.language))
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._flush_lock = threading.Lock()
 
     def add(self, words: Union[str, List[str]]) -> None:
         """
@@ -50,8 +163,12 @@ class CustomStopwords:
         if isinstance(words, str):
             words = [words]
 
-        self.custom_stopwords.update(word.lower() for word in words)
-        self._save()
+        if self._batch_depth:
+            self._stage().update(word.lower() for word in words)
+            self._invalidate_lookup()
+            self._mark_dirty()
+        else:
+            self.custom_stopwords = self.custom_stopwords.union(word.lower() for word in words)
 
     def remove(self, words: Union[str, List[str]]) -> None:
         """
@@ -63,31 +180,316 @@ class CustomStopwords:
         if isinstance(words, str):
             words = [words]
 
-        for word in words:
-            self.custom_stopwords.discard(word.lower())
+        if self._batch_depth:
+            self._stage().difference_update(word.lower() for word in words)
+            self._invalidate_lookup()
+            self._mark_dirty()
+        else:
+            self.custom_stopwords = self.custom_stopwords.difference(word.lower() for word in words)
 
-        self._save()
+    def _stage(self) -> Set[str]:
+        """Get the mutable copy of the custom stopwords that batched changes update."""
+        if self._staged is None:
+            self._staged = set(self._custom)
+        return self._staged
 
-    def get_all(self) -> Set[str]:
-        """Get all stopwords (base + custom)."""
-        return self.base_stopwords.union(self.custom_stopwords)
+    def add_overlay(self, words: Union[str, List[str]]) -> None:
+        """
+        Add in-memory stopwords to the overlay layer (not saved to storage).
+        
+        Args:
+            words: Single word (str) or list of words to add
+        """
+        if isinstance(words, str):
+            words = [words]
+
+        self.overlay_stopwords = self.overlay_stopwords.union(word.lower() for word in words)
+        self._invalidate_lookup()
+
+    def remove_overlay(self, words: Union[str, List[str]]) -> None:
+        """
+        Remove stopwords from the overlay layer.
+        
+        Args:
+            words: Single word (str) or list of words to remove
+        """
+        if isinstance(words, str):
+            words = [words]
+
+        self.overlay_stopwords = self.overlay_stopwords.difference(word.lower() for word in words)
+        self._invalidate_lookup()
+
+    def add_phrases(self, phrases: Union[str, List[str]]) -> None:
+        """
+        Add custom stopphrases.
+        
+        Phrases are lowercased and split into words like text is, so
+        "Terms and Conditions" matches "terms and conditions" in any text.
+        
+        Args:
+            phrases: Single phrase (str) or list of phrases to add
+        """
+        if isinstance(phrases, str):
+            phrases = [phrases]
+
+        self.custom_stopphrases = self.custom_stopphrases.union(
+            filter(None, map(normalize_phrase, phrases)))
+        self._mark_dirty()
+
+    def remove_phrases(self, phrases: Union[str, List[str]]) -> None:
+        """
+        Remove custom stopphrases.
+        
+        Args:
+            phrases: Single phrase (str) or list of phrases to remove
+        """
+        if isinstance(phrases, str):
+            phrases = [phrases]
+
+        self.custom_stopphrases = self.custom_stopphrases.difference(map(normalize_phrase, phrases))
+        self._mark_dirty()
+
+    def phrase_matcher(self) -> Optional[PhraseMatcher]:
+        """
+        Get the compiled automaton for the custom stopphrases.
+
+        Instances with the same phrases share one automaton.
+
+        Returns:
+            PhraseMatcher, or None if there are no stopphrases
+        """
+        if not self.custom_stopphrases:
+            return None
+        return compile_phrases(self.custom_stopphrases)
+
+    def add_patterns(self, patterns: Union[str, List[str]]) -> None:
+        """
+        Add custom stop patterns.
+        
+        Wildcard patterns use * and ? ("http*", "tmp_*"); patterns starting
+        with "re:" are regular expressions ("re:[0-9]+", "re:[0-9a-f]{32,}").
+        A pattern must match a whole lowercase token.
+        
+        Args:
+            patterns: Single pattern (str) or list of patterns to add
+        
+        Raises:
+            ValueError: If a pattern is empty or not a valid regular expression
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+
+        stoppatterns = self.custom_stoppatterns.union([normalize_pattern(pattern) for pattern in patterns])
+        # Compile the whole set before anything changes or is saved
+        compile_patterns(stoppatterns)
+        self.custom_stoppatterns = stoppatterns
+        self.version += 1
+        self._mark_dirty()
+
+    def remove_patterns(self, patterns: Union[str, List[str]]) -> None:
+        """
+        Remove custom stop patterns.
+        
+        Args:
+            patterns: Single pattern (str) or list of patterns to remove
+        
+        Raises:
+            ValueError: If a pattern is empty or not a valid regular expression
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+
+        self.custom_stoppatterns = self.custom_stoppatterns.difference([normalize_pattern(pattern)
+                                                                        for pattern in patterns])
+        self.version += 1
+        self._mark_dirty()
+
+    def pattern_matcher(self) -> Optional[PatternMatcher]:
+        """
+        Get the compiled matcher for the custom stop patterns.
+
+        Instances with the same patterns share one matcher and its memo.
+
+        Returns:
+            PatternMatcher, or None if there are no patterns
+        """
+        if not self.custom_stoppatterns:
+            return None
+        return compile_patterns(self.custom_stoppatterns)
+
+    def get_all(self) -> FrozenSet[str]:
+        """
+        Get all stopwords (base + custom + overlay).
+
+        The returned set is shared and immutable; it is rebuilt only when
+        add() or remove() change the custom stopwords, and only on the first
+        lookup after a change, so a batch of changes merges the layers once.
+        """
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._lookup = StopwordStore.merged(
+                (self.base_stopwords, self.custom_stopwords, self.overlay_stopwords)
+            )
+        return lookup
 
     def is_stopword(self, word: str) -> bool:
-        """Check if a word is a stopword."""
-        return word.lower() in self.get_all()
+        """
+        Check if a word is a stopword (exactly, or by matching a stop pattern).
+
+        Decisions are cached per distinct word (see decision_cache).
+        """
+        return self.decision_cache.decide(word, self.version, self._decide) is None
+
+    def filter_tokens(self, tokens: Iterable[str]) -> List[str]:
+        """
+        Remove the stopwords from tokens split by other code.
+
+        Tokens may be in any case; each distinct token is lowercased and
+        checked once, then its decision is served from decision_cache. Text
+        is still best filtered with preprocess() or analyze(), which
+        lowercase whole chunks and filter in C.
+
+        Args:
+            tokens: Tokens, e.g. from an external tokenizer
+
+        Returns:
+            Lowercase kept tokens, in order
+        """
+        return self.decision_cache.filter(tokens, self.version, self._decide)
+
+    def _decide(self, token: str) -> Optional[str]:
+        """Get a token's filter decision: its lowercase form if kept, None if a stopword."""
+        word = token.lower()
+        if word in self.get_all():
+            return None
+        patterns = self.pattern_matcher()
+        return None if patterns is not None and patterns.matches(word) else word
+
+    @contextmanager
+    def batch(self) -> Iterator["CustomStopwords"]:
+        """
+        Group several changes into a single write, all or nothing.
+
+        Changes made inside the block stay in memory and are written once,
+        when the outermost batch exits. The merged lookup set is rebuilt once
+        too, on the first lookup after the changes. If an exception leaves
+        the outermost batch, the custom stopwords, phrases and patterns are
+        restored to what they were when it started and nothing is written.
+
+        Example:
+            with stopwords.batch():
+                for term in terms:
+                    stopwords.add(term)
+        """
+        if self._batch_depth == 0:
+            saved = (self.custom_stopwords, self.custom_stopphrases, self.custom_stoppatterns,
+                     dict(self._unsaved))
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self._rollback(saved)
+            raise
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._freeze_staged()
+                if not self.defer_save:
+                    self.flush()
+                elif self._unsaved:
+                    self._schedule_flush()
+
+    def _rollback(self, saved: Tuple) -> None:
+        """Restore the state captured when the outermost batch started."""
+        self._staged = None
+        self._custom, self.custom_stopphrases, self.custom_stoppatterns, unsaved = saved
+        self._invalidate_lookup()
+        with self._flush_lock:
+            self._unsaved.clear()
+            self._unsaved.update(unsaved)
+
+    def flush(self) -> None:
+        """Write pending changes to the storage file, if there are any."""
+        with self._flush_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._unsaved:
+                self._save()
+                self._unsaved.clear()
+
+    def _mark_dirty(self) -> None:
+        """Record an in-memory change and write it unless saving is deferred."""
+        with self._flush_lock:
+            self._unsaved.update(
+                words=self._staged if self._staged is not None else self._custom,
+                phrases=self.custom_stopphrases,
+                patterns=self.custom_stoppatterns,
+            )
+
+        if not self.defer_save:
+            if self._batch_depth == 0:
+                self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Start the flush_interval timer, unless it is disabled or already running."""
+        if self.flush_interval is None or self._timer is not None:
+            return
+        # The timer holds a weak reference, so it doesn't keep the instance alive
+        self._timer = threading.Timer(self.flush_interval, _timed_flush, (weakref.ref(self),))
+        self._timer.daemon = True
+        self._timer.start()
 
     def _save(self) -> None:
-        """Save custom stopwords to storage file."""
-        with open(self.storage_path, "r") as f:
-            data = json.load(f)
+        """Save custom stopwords to storage file atomically (temp file + rename)."""
+        _write_stopwords(self.storage_path, self.language, self.custom_stopwords,
+                         self.custom_stopphrases, self.custom_stoppatterns)
 
-        data[self.language] = sorted(self.custom_stopwords)
 
-        with open(self.storage_path, "w") as f:
-            json.dump(data, f, indent=4)
+def _write_stopwords(storage_path: str, language: str, words: Collection[str],
+                     phrases: Collection[str], patterns: Collection[str]) -> None:
+    """Write one language's custom stopwords, phrases and patterns to a storage file."""
+    data = StopwordStore.load(storage_path)
+    data[language] = sorted(words)
+    # Copied level by level, since the loaded data is shared with the store's cache
+    sections = dict(data.get(SECTIONS_KEY, {}))
+    for section, entries in ((STOPPHRASES_KEY, phrases), (STOPPATTERNS_KEY, patterns)):
+        if entries or language in sections.get(section, {}):
+            sections[section] = {**sections.get(section, {}), language: sorted(entries)}
+    if sections:
+        data[SECTIONS_KEY] = sections
+
+    write_json(storage_path, data, indent=4)
+    StopwordStore.update(storage_path, data)
+
+
+def _timed_flush(ref: "weakref.ref[CustomStopwords]") -> None:
+    """Body of the flush_interval timer: flush, or leave it to the exit of an open batch."""
+    stopwords = ref()
+    if stopwords is None:
+        return
+    if stopwords._batch_depth:
+        stopwords._timer = None
+    else:
+        stopwords.flush()
 
 
-def preprocess(text: str, stopwords_plugin: CustomStopwords, remove_stopwords: bool = True) -> List[str]:
+def _release(storage_path: str, language: str, unsaved: Dict[str, Collection[str]]) -> None:
+    """Finalizer of CustomStopwords: write unflushed changes, then release the store reference."""
+    try:
+        if unsaved:
+            _write_stopwords(storage_path, language, list(unsaved["words"]),
+                             unsaved["phrases"], unsaved["patterns"])
+            unsaved.clear()
+    finally:
+        StopwordStore.release(storage_path)
+
+
+def preprocess(text: str, stopwords_plugin: CustomStopwords, remove_stopwords: bool = True,
+               tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> List[str]:
     """
     Preprocess text by tokenizing and optionally removing stopwords.
     
@@ -95,14 +497,314 @@ def preprocess(text: str, stopwords_plugin: CustomStopwords, remove_stopwords: b
         text: Input text to process
         stopwords_plugin: CustomStopwords plugin instance
         remove_stopwords: Whether to remove stopwords (default: True)
+        tokenizer: Tokenizer to split words with (default: the \\b\\w+\\b
+            words, with an ASCII fast path)
     
     Returns:
         List of processed tokens
     """
     # Convert to lowercase and split into words
-    words = re.findall(r'\b\w+\b', text.lower())
+    words = tokenizer.tokenize(text)
     
     if remove_stopwords:
-        return [word for word in words if not stopwords_plugin.is_stopword(word)]
+        matcher = stopwords_plugin.phrase_matcher()
+        if matcher is not None:
+            words = matcher.remove(words)
+        # Tokens are already lowercase, so test the merged set directly
+        lookup = stopwords_plugin.get_all()
+        kept = list(filterfalse(lookup.__contains__, words))
+        patterns = stopwords_plugin.pattern_matcher()
+        return patterns.remove(kept) if patterns is not None else kept
     
     return words
+
+
+def iter_text_chunks(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Read a text stream in fixed-size pieces that never split a word.
+
+    Each yielded chunk ends on whitespace (or at end of stream), so lowercasing
+    and tokenizing chunks one at a time gives exactly the same tokens as doing
+    it on the whole text. A run without whitespace longer than chunk_size is
+    carried over until it ends, so memory is bounded by chunk_size plus the
+    longest such run.
+
+    Args:
+        stream: Text stream opened for reading
+        chunk_size: Number of characters to read at a time
+
+    Yields:
+        Consecutive pieces of the stream's text
+    """
+    pending: List[str] = []
+
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+
+        cut = len(block) - 1
+        while cut >= 0 and not block[cut].isspace():
+            cut -= 1
+
+        if cut < 0:
+            pending.append(block)
+            continue
+
+        pending.append(block[:cut + 1])
+        yield "".join(pending)
+        pending = [block[cut + 1:]]
+
+    tail = "".join(pending)
+    if tail:
+        yield tail
+
+
+def preprocess_stream(stream: TextIO, stopwords_plugin: CustomStopwords, remove_stopwords: bool = True,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      tokenizer: Optional[Tokenizer] = None) -> Iterator[str]:
+    """
+    Preprocess a text stream chunk by chunk, yielding tokens lazily.
+
+    Produces the same tokens as preprocess() on the stream's full text while
+    holding only one chunk in memory.
+    
+    Args:
+        stream: Text stream opened for reading
+        stopwords_plugin: CustomStopwords plugin instance
+        remove_stopwords: Whether to remove stopwords (default: True)
+        chunk_size: Number of characters to read at a time
+        tokenizer: Tokenizer to split words with (see iter_tokens)
+    
+    Returns:
+        Iterator of processed tokens (see iter_tokens)
+    """
+    return iter_tokens(stream, stopwords_plugin, remove_stopwords, chunk_size, tokenizer)
+
+
+def iter_tokens(text_or_stream: Union[str, TextIO], stopwords_plugin: CustomStopwords,
+                remove_stopwords: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                tokenizer: Optional[Tokenizer] = None) -> Iterator[str]:
+    """
+    Lazily tokenize text and optionally remove stopwords.
+
+    Yields the same tokens as preprocess() without building a list, so
+    callers that only count tokens (e.g. with a Counter) never hold them all.
+    
+    Args:
+        text_or_stream: Input text, or a text stream read in chunks
+        stopwords_plugin: CustomStopwords plugin instance
+        remove_stopwords: Whether to remove stopwords (default: True)
+        chunk_size: Characters per chunk when reading a stream
+        tokenizer: Tokenizer to split words with (default: the compiled
+            word regex, matched lazily so no per-chunk word list is built)
+    
+    Yields:
+        Processed tokens
+    """
+    if isinstance(text_or_stream, str):
+        chunks = (text_or_stream,)
+    else:
+        chunks = iter_text_chunks(text_or_stream, chunk_size)
+
+    lookup = stopwords_plugin.get_all()
+    matcher = stopwords_plugin.phrase_matcher() if remove_stopwords else None
+    phrases = matcher.stream() if matcher is not None else None
+    patterns = stopwords_plugin.pattern_matcher() if remove_stopwords else None
+    matches_pattern = patterns.matches if patterns is not None else None
+
+    for chunk in chunks:
+        if phrases is not None:
+            # Phrase removal needs the chunk's words as a list
+            lowered = chunk.lower()
+            words = phrases.feed(WORD_PATTERN.findall(lowered) if tokenizer is None
+                                 else tokenizer.words(lowered))
+        elif tokenizer is None:
+            words = (match.group() for match in WORD_PATTERN.finditer(chunk.lower()))
+        else:
+            words = tokenizer.words(chunk.lower())
+        for word in words:
+            if not remove_stopwords or not (word in lookup
+                                            or matches_pattern is not None and matches_pattern(word)):
+                yield word
+
+    if phrases is not None:
+        kept = list(filterfalse(lookup.__contains__, phrases.close()))
+        yield from patterns.remove(kept) if patterns is not None else kept
+
+
+class TextAnalysis(NamedTuple):
+    """Result of analyze(): everything the pipeline needs from one scan of a text."""
+
+    length: int
+    raw_count: int
+    token_count: int
+    unique_count: int
+    tokens: Optional[List[str]]
+    frequencies: Optional[Counter]
+    token_ids: Optional[array] = None
+    # Distinct kept tokens, a by-product of unique counting (None if not computed)
+    distinct: Optional[Collection[str]] = None
+
+
+class AnalysisBuilder:
+    """
+    Accumulates per-chunk words into a TextAnalysis.
+
+    With a vocabulary, kept words are encoded to integer IDs as they arrive;
+    the IDs are kept instead of the token strings, and counting runs on them:
+    once at the end with the NumPy backend, per chunk with the Python one.
+    """
+
+    def __init__(self, frequencies: bool = False, keep_tokens: bool = True,
+                 vocabulary: Optional[Vocabulary] = None, backend: Optional[str] = None):
+        self.frequencies = frequencies
+        self.keep_tokens = keep_tokens
+        self.vocabulary = vocabulary
+        self.backend = resolve_backend(backend)
+        self.length = 0
+        self.raw_count = 0
+        self.token_count = 0
+        self.tokens: List[str] = []
+        self.token_ids = array("I")
+        self.counts: Counter = Counter()
+        # Without frequencies or a token list to return, a set is enough for unique
+        # counting; with IDs the set is always used, so the ID array is never rescanned
+        self.seen = set() if vocabulary is not None or not (frequencies or keep_tokens) else None
+
+    def add(self, length: int, raw_count: int, kept: List[str]) -> None:
+        """
+        Add one chunk.
+
+        Args:
+            length: Number of characters in the chunk
+            raw_count: Number of words in the chunk before filtering
+            kept: Words kept after filtering
+        """
+        self.length += length
+        self.raw_count += raw_count
+        self.token_count += len(kept)
+
+        if self.vocabulary is not None:
+            ids = self.vocabulary.encode(kept)
+            if self.keep_tokens or self.backend == "numpy":
+                self.token_ids.extend(ids)
+            if self.backend == "numpy":
+                return
+            if self.frequencies:
+                self.counts.update(ids)
+            self.seen.update(ids)
+            return
+
+        if self.keep_tokens:
+            if self.tokens:
+                self.tokens.extend(kept)
+            else:
+                self.tokens = kept
+        if self.frequencies:
+            self.counts.update(kept)
+        elif self.seen is not None:
+            self.seen.update(kept)
+
+    def build(self) -> TextAnalysis:
+        """Get the analysis of all chunks added so far."""
+        if self.vocabulary is not None:
+            token = self.vocabulary.token
+            frequencies = None
+            if self.backend == "numpy":
+                if self.frequencies:
+                    frequencies = IdFrequencies(self.token_ids, self.vocabulary)
+                    distinct_ids = frequencies.ids.tolist()
+                else:
+                    distinct_ids = unique_ids(self.token_ids).tolist()
+            else:
+                distinct_ids = self.seen
+                if self.frequencies:
+                    frequencies = Counter({token(i): n for i, n in self.counts.items()})
+            return TextAnalysis(
+                length=self.length,
+                raw_count=self.raw_count,
+                token_count=self.token_count,
+                unique_count=len(distinct_ids),
+                tokens=None,
+                frequencies=frequencies,
+                token_ids=self.token_ids if self.keep_tokens else None,
+                distinct=[token(i) for i in distinct_ids],
+            )
+
+        if self.frequencies:
+            distinct = self.counts.keys()
+        elif self.seen is not None:
+            distinct = self.seen
+        else:
+            distinct = set(self.tokens)
+
+        return TextAnalysis(
+            length=self.length,
+            raw_count=self.raw_count,
+            token_count=self.token_count,
+            unique_count=len(distinct),
+            tokens=self.tokens if self.keep_tokens else None,
+            frequencies=self.counts if self.frequencies else None,
+            distinct=distinct,
+        )
+
+
+def analyze(text_or_stream: Union[str, TextIO], stopwords_plugin: CustomStopwords,
+            remove_stopwords: bool = True, frequencies: bool = False, keep_tokens: bool = True,
+            chunk_size: int = DEFAULT_CHUNK_SIZE, vocabulary: Optional[Vocabulary] = None,
+            backend: Optional[str] = None, tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextAnalysis:
+    """
+    Tokenize, filter and count a text in a single pass.
+
+    One scan yields the raw words (with the default tokenizer, translate +
+    split for pure-ASCII text, the word regex otherwise); the raw word count, kept tokens, unique
+    count and (optionally) frequencies are all derived from it, with
+    stopword filtering done in C via the merged lookup set.
+    
+    Args:
+        text_or_stream: Input text, or a text stream read in chunks
+        stopwords_plugin: CustomStopwords plugin instance
+        remove_stopwords: Whether to remove stopwords (default: True)
+        frequencies: Whether to count occurrences of each kept token
+        keep_tokens: Whether to return the list of kept tokens
+        chunk_size: Characters per chunk when reading a stream
+        vocabulary: If given, kept tokens are returned as an array('I') of
+            IDs from this vocabulary (token_ids) instead of strings
+        backend: Counting backend for token IDs, "numpy" or "python"
+            (default: NumPy when it is installed)
+        tokenizer: Tokenizer to split words with
+    
+    Returns:
+        TextAnalysis with the text length, raw word count, kept token count,
+        unique kept token count, and the tokens/frequencies if requested
+    """
+    if isinstance(text_or_stream, str):
+        chunks = (text_or_stream,)
+    else:
+        chunks = iter_text_chunks(text_or_stream, chunk_size)
+
+    lookup = stopwords_plugin.get_all()
+    matcher = stopwords_plugin.phrase_matcher() if remove_stopwords else None
+    phrases = matcher.stream() if matcher is not None else None
+    patterns = stopwords_plugin.pattern_matcher() if remove_stopwords else None
+    builder = AnalysisBuilder(frequencies, keep_tokens, vocabulary, backend)
+    split_words = tokenizer.words
+
+    for chunk in chunks:
+        words = split_words(chunk.lower())
+        if remove_stopwords:
+            candidates = phrases.feed(words) if phrases is not None else words
+            kept = list(filterfalse(lookup.__contains__, candidates))
+            if patterns is not None:
+                kept = patterns.remove(kept)
+        else:
+            kept = words
+        builder.add(len(chunk), len(words), kept)
+
+    if phrases is not None:
+        # Words held back in case a phrase continued past the last chunk
+        kept = list(filterfalse(lookup.__contains__, phrases.close()))
+        builder.add(0, 0, patterns.remove(kept) if patterns is not None else kept)
+
+    return builder.build()
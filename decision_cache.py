@@ -0,0 +1,175 @@
+"""
+Decision Cache - Bounded cache of per-token stopword filter decisions
+Lets CustomStopwords decide each distinct token once instead of once per occurrence
+"""
+
+import threading
+from functools import partial
+from operator import is_not
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+# Default number of distinct tokens whose decision is remembered
+DEFAULT_MAX_SIZE = 1 << 16
+
+# Marks a token with no cached decision (None is the decision for a stopword)
+_MISSING = object()
+
+# Keeps the decisions of kept tokens, including empty normalized forms
+_is_kept = partial(is_not, None)
+
+
+class DecisionCache:
+    """
+    Bounded cache mapping raw tokens to filter decisions.
+
+    A decision is the token's normalized (lowercase) form if it is kept,
+    or None if it is a stopword. Entries are tagged with the version of the
+    stopwords that produced them; a lookup with any other version drops
+    every entry first, so changes to the stopwords are never served stale.
+
+    Eviction approximates LRU with two generations: hits in the older
+    generation are promoted to the recent one, and when the recent one is
+    full it becomes the older one and the previous older one is dropped.
+    Tokens in use stay cached, and batch lookups stay in C (one set
+    difference plus a map over the dictionary), with Python work only for
+    tokens not in the recent generation. A batch with more distinct tokens
+    than max_size / 2 is held whole until the next lookup.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size: Maximum number of cached tokens (0 disables caching)
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version: Hashable = None
+        self._recent: Dict[str, Optional[str]] = {}
+        self._older: Dict[str, Optional[str]] = {}
+
+    def decide(self, token: str, version: Hashable,
+               compute: Callable[[str], Optional[str]]) -> Optional[str]:
+        """
+        Get the decision for one token, computing it on a miss.
+
+        Args:
+            token: Raw token
+            version: Version of the stopwords the decision must come from
+            compute: Function returning the decision for a token
+
+        Returns:
+            The normalized token if it is kept, None if it is a stopword
+        """
+        if not self.max_size:
+            self.misses += 1
+            return compute(token)
+
+        # Hits read the recent generation without the lock: a dict lookup is
+        # atomic, and generations are replaced rather than modified in place
+        # when they are dropped
+        if version == self._version:
+            decision = self._recent.get(token, _MISSING)
+            if decision is not _MISSING:
+                self.hits += 1
+                return decision
+
+        with self._lock:
+            self._check_version(version)
+            decision = self._recent.get(token, _MISSING)
+            if decision is _MISSING:
+                decision = self._older.pop(token, _MISSING)
+                if decision is _MISSING:
+                    self.misses += 1
+                    decision = compute(token)
+                else:
+                    self.hits += 1
+                self._make_room(1)
+                self._recent[token] = decision
+            else:
+                self.hits += 1
+            return decision
+
+    def filter(self, tokens: Iterable[str], version: Hashable,
+               compute: Callable[[str], Optional[str]]) -> List[str]:
+        """
+        Get the normalized forms of the kept tokens of a sequence.
+
+        Args:
+            tokens: Raw tokens
+            version: Version of the stopwords the decisions must come from
+            compute: Function returning the decision for a token
+
+        Returns:
+            Normalized kept tokens, in order
+        """
+        tokens = tokens if isinstance(tokens, list) else list(tokens)
+        if not self.max_size:
+            with self._lock:
+                self.misses += len(tokens)
+            return list(filter(_is_kept, map(compute, tokens)))
+
+        with self._lock:
+            self._check_version(version)
+            unseen = set(tokens).difference(self._recent)
+            computed = 0
+            if unseen:
+                if self._make_room(len(unseen)):
+                    # The new generation must hold every token of this batch
+                    unseen = set(tokens)
+                recent, older = self._recent, self._older
+                for token in unseen:
+                    decision = older.pop(token, _MISSING)
+                    if decision is _MISSING:
+                        computed += 1
+                        decision = compute(token)
+                    recent[token] = decision
+            self.misses += computed
+            self.hits += len(tokens) - computed
+            return list(filter(_is_kept, map(self._recent.__getitem__, tokens)))
+
+    def clear(self) -> None:
+        """Drop every cached decision."""
+        with self._lock:
+            self._recent = {}
+            self._older = {}
+
+    def stats(self) -> Dict:
+        """
+        Get hit/miss counters and the number of cached tokens.
+
+        Hits are counted without locking on the single-token path, so under
+        heavy thread contention they may slightly undercount.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._recent) + len(self._older),
+                "max_size": self.max_size,
+            }
+
+    def __getstate__(self):
+        # Copies sent to worker processes start empty
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_size"])
+
+    def _check_version(self, version: Hashable) -> None:
+        """Drop every entry if the stopwords changed since they were cached."""
+        if version != self._version:
+            self._version = version
+            self._recent = {}
+            self._older = {}
+
+    def _make_room(self, incoming: int) -> bool:
+        """Start a new recent generation if incoming entries don't fit; True if one was started."""
+        if len(self._recent) + incoming <= self.max_size // 2:
+            return False
+        self._older = self._recent
+        self._recent = {}
+        return True
@@ -4,22 +4,48 @@ This module provides specialized processors for various content domains
 """
 
 from custom_stopwords import CustomStopwords
+from stopword_store import StopwordStore
 from text_processor import TextProcessor
+from tokenization import TokenizerRegistry
 
 
 class DocumentTypeProcessors:
     """Factory for creating specialized TextProcessor instances for different document types"""
 
+    # Storage file shared by every document type's processor
+    STORAGE_PATH = "custom_stopwords.json"
+
+    # Domain terms layered over the shared custom stopwords for each document
+    # type, together with the type's section of the storage file, if any.
+    # They live only in memory and are never written to storage.
+    DOMAIN_OVERLAYS = {
+        "technical": [],
+        "web": ["html", "css", "javascript", "browser", "page", "link", "button", "form"],
+        "business": ["company", "business", "market", "customer", "product", "revenue", "profit"],
+        "academic": ["abstract", "introduction", "conclusion", "method", "result", "study", "research", "paper", "author"],
+        "news": ["said", "says", "reported", "according", "news", "article", "story", "source", "today"],
+    }
+
+    @staticmethod
+    def _create_processor(doc_type: str) -> TextProcessor:
+        """
+        Create a processor whose stopwords are base + custom + the type's domain
+        overlay, using the tokenizer chosen for the type in TokenizerRegistry.
+        """
+        storage_path = DocumentTypeProcessors.STORAGE_PATH
+        overlay = [*DocumentTypeProcessors.DOMAIN_OVERLAYS[doc_type],
+                   *StopwordStore.domain_overlay(storage_path, doc_type)]
+        stopwords = CustomStopwords(language="english", storage_path=storage_path, overlay=overlay)
+        return TextProcessor(stopwords_plugin=stopwords,
+                             tokenizer=TokenizerRegistry.for_doc_type(doc_type))
+
     @staticmethod
     def create_technical_processor():
         """
         Create processor for technical documentation, code comments, and API docs.
         Filters out technical jargon common in these documents.
         """
-        stopwords = CustomStopwords(language="english", storage_path="custom_stopwords.json")
-        # Load technical domain stopwords if available
-        processor = TextProcessor(stopwords_plugin=stopwords)
-        return processor
+        return DocumentTypeProcessors._create_processor("technical")
 
     @staticmethod
     def create_web_content_processor():
@@ -27,12 +53,7 @@ class DocumentTypeProcessors:
         Create processor for web content, articles, and blog posts.
         Removes common web-related stopwords.
         """
-        stopwords = CustomStopwords(language="english", storage_path="custom_stopwords.json")
-        # Add additional web-specific terms
-        web_terms = ["html", "css", "javascript", "browser", "page", "link", "button", "form"]
-        stopwords.add(web_terms)
-        processor = TextProcessor(stopwords_plugin=stopwords)
-        return processor
+        return DocumentTypeProcessors._create_processor("web")
 
     @staticmethod
     def create_business_processor():
@@ -40,36 +61,21 @@ class DocumentTypeProcessors:
         Create processor for business documents, reports, and proposals.
         Filters business-specific terminology.
         """
-        stopwords = CustomStopwords(language="english", storage_path="custom_stopwords.json")
-        # Add business-specific terms
-        business_terms = ["company", "business", "market", "customer", "product", "revenue", "profit"]
-        stopwords.add(business_terms)
-        processor = TextProcessor(stopwords_plugin=stopwords)
-        return processor
+        return DocumentTypeProcessors._create_processor("business")
 
     @staticmethod
     def create_academic_processor():
         """
         Create processor for academic papers and research documents.
         """
-        stopwords = CustomStopwords(language="english", storage_path="custom_stopwords.json")
-        # Add academic-specific terms
-        academic_terms = ["abstract", "introduction", "conclusion", "method", "result", "study", "research", "paper", "author"]
-        stopwords.add(academic_terms)
-        processor = TextProcessor(stopwords_plugin=stopwords)
-        return processor
+        return DocumentTypeProcessors._create_processor("academic")
 
     @staticmethod
     def create_news_processor():
         """
         Create processor for news articles and journalistic content.
         """
-        stopwords = CustomStopwords(language="english", storage_path="custom_stopwords.json")
-        # Add news-specific terms
-        news_terms = ["said", "says", "reported", "according", "news", "article", "story", "source", "today"]
-        stopwords.add(news_terms)
-        processor = TextProcessor(stopwords_plugin=stopwords)
-        return processor
+        return DocumentTypeProcessors._create_processor("news")
 
 
 class ProcessorRegistry:
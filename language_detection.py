@@ -0,0 +1,116 @@
+"""
+Language Detection - Multi-language stopword index with cheap per-document language detection
+Scores each configured language by the share of a document's sampled words that are its stopwords
+"""
+
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from stopword_store import StopwordStore
+from tokenization import DEFAULT_TOKENIZER, Tokenizer
+
+# Characters sampled from the start of a document for detection
+DEFAULT_SAMPLE_SIZE = 2000
+
+# Minimum share of sampled words that must be stopwords of the best language
+DEFAULT_MIN_RATIO = 0.1
+
+
+class MultiLanguageStopwords:
+    """
+    Base stopword lists of several languages, loaded once, with an index
+    for detecting which language a document is written in.
+
+    Every stopword maps to a bitmask of the languages that list it, so a
+    sampled word costs one dictionary probe however many languages are
+    configured. Stopwords are usually 30-50% of running text in their own
+    language and far fewer in others, so the language with the highest
+    stopword-hit ratio on a short prefix is a reliable guess.
+    """
+
+    def __init__(self, languages: Iterable[str], sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 min_ratio: float = DEFAULT_MIN_RATIO, tokenizer: Tokenizer = DEFAULT_TOKENIZER):
+        """
+        Load the base stopwords of each language.
+
+        Args:
+            languages: NLTK stopword languages, in order of preference for ties
+            sample_size: Characters from the start of a document used for detection
+            min_ratio: Minimum stopword-hit ratio for a language to be detected
+            tokenizer: Tokenizer to split the sample with
+
+        Raises:
+            ValueError: If no language is given
+        """
+        self.languages: List[str] = list(dict.fromkeys(languages))
+        if not self.languages:
+            raise ValueError("At least one language is required")
+        self.sample_size = sample_size
+        self.min_ratio = min_ratio
+        self.tokenizer = tokenizer
+
+        self._index: Dict[str, int] = {}
+        for position, language in enumerate(self.languages):
+            bit = 1 << position
+            for word in StopwordStore.base_stopwords(language):
+                self._index[word] = self._index.get(word, 0) | bit
+
+    def stopwords(self, language: str) -> FrozenSet[str]:
+        """
+        Get the base stopwords of a configured language.
+
+        Raises:
+            ValueError: If the language is not configured
+        """
+        if language not in self.languages:
+            available = ", ".join(self.languages)
+            raise ValueError(f"Unknown language '{language}'. Available: {available}")
+        return StopwordStore.base_stopwords(language)
+
+    def sample(self, text: str) -> str:
+        """Cut the detection sample from the start of a text, ending on whitespace."""
+        if len(text) <= self.sample_size:
+            return text
+        sample = text[:self.sample_size]
+        cut = max(sample.rfind(" "), sample.rfind("\n"))
+        return sample[:cut] if cut > 0 else sample
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        Score each language by the share of sampled words that are its stopwords.
+
+        Args:
+            text: Document text (only the first sample_size characters are read)
+
+        Returns:
+            Dictionary of language to hit ratio between 0 and 1
+        """
+        words = self.tokenizer.words(self.sample(text).lower())
+        hits = [0] * len(self.languages)
+
+        for mask, count in Counter(map(self._index.get, words)).items():
+            position = 0
+            while mask:
+                if mask & 1:
+                    hits[position] += count
+                mask >>= 1
+                position += 1
+
+        total = len(words)
+        return {language: round(hits[position] / total, 4) if total else 0.0
+                for position, language in enumerate(self.languages)}
+
+    def detect(self, text: str) -> Optional[str]:
+        """
+        Detect the language of a text.
+
+        Args:
+            text: Document text (only the first sample_size characters are read)
+
+        Returns:
+            The language with the highest hit ratio (the earliest configured
+            on ties), or None if no language reaches min_ratio
+        """
+        scores = self.scores(text)
+        language = max(self.languages, key=scores.__getitem__)
+        return language if scores[language] >= self.min_ratio else None
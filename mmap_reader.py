@@ -0,0 +1,152 @@
+"""
+Memory-Mapped Reader - Tokenizes large UTF-8 files straight from a mapped buffer
+Avoids the read-copy-lower-copy chain and shares the OS page cache between processes
+"""
+
+import mmap
+import os
+from functools import lru_cache
+from itertools import filterfalse
+from typing import FrozenSet, Iterator, List, Optional
+
+from custom_stopwords import CustomStopwords, AnalysisBuilder, TextAnalysis
+from tokenization import DEFAULT_TOKENIZER, Tokenizer
+from vocabulary import Vocabulary
+
+# Bytes taken from the mapping per slice; slices end on ASCII whitespace
+DEFAULT_SLICE_SIZE = 1 << 16
+
+_WHITESPACE = (b" ", b"\n", b"\t", b"\r", b"\x0b", b"\x0c")
+
+# Maps every ASCII byte that \w does not match to a space
+_NON_WORD_BYTES = bytes(code for code in range(128) if not (chr(code).isalnum() or chr(code) == "_"))
+_ASCII_NON_WORD_BYTES = bytes.maketrans(_NON_WORD_BYTES, b" " * len(_NON_WORD_BYTES))
+
+
+@lru_cache(maxsize=16)
+def _ascii_lookup(lookup: FrozenSet[str]) -> FrozenSet[bytes]:
+    """Encode the ASCII members of a stopword set for byte-level filtering."""
+    return frozenset(word.encode("ascii") for word in lookup if word.isascii())
+
+
+def iter_slices(buffer, slice_size: int = DEFAULT_SLICE_SIZE) -> Iterator[bytes]:
+    """
+    Cut a bytes-like buffer into pieces that end on ASCII whitespace.
+
+    Cutting on whitespace never splits a word or a multi-byte UTF-8
+    character, so pieces can be tokenized independently.
+
+    Args:
+        buffer: Bytes-like object such as an mmap
+        slice_size: Approximate number of bytes per piece
+
+    Yields:
+        Consecutive byte pieces of the buffer
+    """
+    size = len(buffer)
+    start = 0
+
+    while start < size:
+        end = min(start + slice_size, size)
+        search_from = start
+
+        while end < size:
+            cut = max(buffer.rfind(space, search_from, end) for space in _WHITESPACE)
+            if cut >= 0:
+                end = cut + 1
+                break
+            search_from = end
+            end = min(end + slice_size, size)
+
+        yield buffer[start:end]
+        start = end
+
+
+def analyze_mmap(file_path: str, stopwords_plugin: CustomStopwords, remove_stopwords: bool = True,
+                 frequencies: bool = False, keep_tokens: bool = True,
+                 slice_size: int = DEFAULT_SLICE_SIZE,
+                 vocabulary: Optional[Vocabulary] = None,
+                 backend: Optional[str] = None,
+                 tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextAnalysis:
+    """
+    Analyze a UTF-8 file through a read-only memory mapping.
+
+    Pure-ASCII slices are lowercased, split and stopword-filtered as bytes,
+    and only the surviving words are decoded into str tokens. Slices with
+    non-ASCII bytes are decoded and tokenized with full Unicode semantics.
+    The result is identical to analyze() on the file's text. Tokenizers that
+    don't match the word regex, and stopphrases (which need the stopwords
+    that the byte path drops), get every slice decoded instead.
+
+    Args:
+        file_path: Path to a UTF-8 text file
+        stopwords_plugin: CustomStopwords plugin instance
+        remove_stopwords: Whether to remove stopwords (default: True)
+        frequencies: Whether to count occurrences of each kept token
+        keep_tokens: Whether to return the list of kept tokens
+        slice_size: Approximate number of bytes processed at a time
+        vocabulary: If given, return kept tokens as IDs (see analyze())
+        backend: Counting backend for token IDs (see analyze())
+        tokenizer: Tokenizer to split words with
+
+    Returns:
+        TextAnalysis of the file's contents
+
+    Raises:
+        FileNotFoundError: If file doesn't exist
+        UnicodeDecodeError: If the file is not valid UTF-8
+    """
+    builder = AnalysisBuilder(frequencies, keep_tokens, vocabulary, backend)
+
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return builder.build()
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+            lookup = stopwords_plugin.get_all()
+            byte_lookup = _ascii_lookup(lookup)
+            matcher = stopwords_plugin.phrase_matcher() if remove_stopwords else None
+            phrases = matcher.stream() if matcher is not None else None
+            patterns = stopwords_plugin.pattern_matcher() if remove_stopwords else None
+            byte_path = tokenizer.matches_word_pattern and phrases is None
+            previous_cr = False
+
+            for piece in iter_slices(mapped, slice_size):
+                # Text-mode reads turn "\r\n" into one "\n"; count lengths the same way
+                newline_pairs = piece.count(b"\r\n") + (previous_cr and piece.startswith(b"\n"))
+                previous_cr = piece.endswith(b"\r")
+
+                if byte_path and piece.isascii():
+                    words = piece.lower().translate(_ASCII_NON_WORD_BYTES).split()
+                    survivors = list(filterfalse(byte_lookup.__contains__, words)) if remove_stopwords else words
+                    kept = _decode_words(survivors)
+                    if patterns is not None:
+                        kept = patterns.remove(kept)
+                    builder.add(len(piece) - newline_pairs, len(words), kept)
+                else:
+                    text = piece.decode("utf-8")
+                    words = tokenizer.words(text.lower())
+                    if remove_stopwords:
+                        candidates = phrases.feed(words) if phrases is not None else words
+                        kept = list(filterfalse(lookup.__contains__, candidates))
+                        if patterns is not None:
+                            kept = patterns.remove(kept)
+                    else:
+                        kept = words
+                    builder.add(len(text) - newline_pairs, len(words), kept)
+
+            if phrases is not None:
+                kept = list(filterfalse(lookup.__contains__, phrases.close()))
+                builder.add(0, 0, patterns.remove(kept) if patterns is not None else kept)
+
+    return builder.build()
+
+
+def _decode_words(words: List[bytes]) -> List[str]:
+    """Decode ASCII byte words to str in one join/split instead of one call per word."""
+    if not words:
+        return []
+    return b" ".join(words).decode("ascii").split(" ")
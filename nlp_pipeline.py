@@ -3,11 +3,25 @@ NLP Pipeline - End-to-end text processing pipeline with multiple document types
 Integrates CustomStopwords and TextProcessor for comprehensive text analysis
 """
 
-from typing import Dict, List, Tuple, Optional
+import asyncio
+import os
+import weakref
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import (AsyncIterator, Awaitable, Callable, Collection, Deque, Dict, Iterable, Iterator,
+                    List, Tuple, Optional, Union)
 from pathlib import Path
-from custom_stopwords import CustomStopwords
+from custom_stopwords import CustomStopwords, TextAnalysis, analyze, DEFAULT_CHUNK_SIZE
+from language_detection import MultiLanguageStopwords
+from mmap_reader import analyze_mmap
 from text_processor import TextProcessor
 from document_processors import ProcessorRegistry
+from pipeline_stats import PipelineStats
+from vocabulary import Vocabulary
+from token_counts import DocumentTermMatrix, MatrixBuilder, resolve_backend
+from term_stats import DocumentFrequencies
 
 
 class NLPPipeline:
@@ -16,16 +30,62 @@ class NLPPipeline:
     Supports multiple document types with specialized stopword filtering.
     """
 
-    def __init__(self, default_type: str = "technical"):
+    RETENTION_POLICIES = ("all", "ring", "none")
+
+    def __init__(self, default_type: str = "technical", retention: str = "all",
+                 max_results: int = 1000, vocabulary: Optional[Vocabulary] = None,
+                 backend: Optional[str] = None, concurrency: int = 8,
+                 languages: Optional[Iterable[str]] = None):
         """
         Initialize the NLP pipeline.
         
         Args:
             default_type: Default document type for processing
+            retention: Which per-document results to keep in self.results:
+                "all" keeps every result, "ring" keeps the last max_results,
+                "none" keeps only the aggregate counters behind get_pipeline_stats()
+            max_results: Ring buffer size for the "ring" policy
+            vocabulary: Token vocabulary used for as_ids results (default: a
+                new one shared by all document types of this pipeline)
+            backend: How as_ids results are counted: "numpy" (np.unique and
+                argpartition over the ID arrays) or "python" (Counter/set);
+                defaults to NumPy when it is installed
+            concurrency: Maximum number of documents the async methods
+                (aprocess_file, aiter_directory, ...) process at once
+            languages: Stopword languages to detect per document. Each
+                document is filtered with the stopwords of its detected
+                language and its result reports it under "language"
+                (default: no detection; every document uses its processor's
+                language)
+        
+        Raises:
+            ValueError: If the retention policy or backend is not recognized,
+                or concurrency is below 1
         """
+        if retention not in self.RETENTION_POLICIES:
+            available = ", ".join(self.RETENTION_POLICIES)
+            raise ValueError(f"Unknown retention policy '{retention}'. Available: {available}")
+        if retention == "ring" and max_results < 1:
+            raise ValueError("max_results must be at least 1 for the 'ring' retention policy")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
         self.default_type = default_type
+        self.retention = retention
+        self.max_results = max_results
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.backend = resolve_backend(backend)
+        self.concurrency = concurrency
         self.processors: Dict[str, TextProcessor] = {}
-        self.results: List[Dict] = []
+        self.language_index = MultiLanguageStopwords(languages) if languages else None
+        # Stopwords of a document type in another detected language than its processor's
+        self._language_plugins: Dict[Tuple[str, str], CustomStopwords] = {}
+        self._thread_executor: Optional[ThreadPoolExecutor] = None
+        # Process pools from process_executor(), whose workers have this pipeline set up
+        self._process_executors = weakref.WeakSet()
+        # One concurrency limit per event loop the async methods run on
+        self._limits = weakref.WeakKeyDictionary()
+        self.reset()
 
     def get_processor(self, doc_type: str) -> TextProcessor:
         """
@@ -42,7 +102,8 @@ class NLPPipeline:
         return self.processors[doc_type]
 
     def process_text(self, text: str, doc_type: Optional[str] = None, 
-                    get_frequency: bool = False, top_n: int = 10) -> Dict:
+                    get_frequency: bool = False, top_n: int = 10,
+                    keep_tokens: bool = True, as_ids: bool = False) -> Dict:
         """
         Process a single text string.
         
@@ -51,36 +112,100 @@ class NLPPipeline:
             doc_type: Document type (uses default if None)
             get_frequency: Whether to compute word frequency
             top_n: Number of top words for frequency analysis
+            keep_tokens: Include the token list in the result
+            as_ids: Return tokens as "token_ids", an array('I') of IDs from
+                self.vocabulary, instead of a list of strings; see decode()
         
         Returns:
-            Dictionary with processing results
+            Dictionary with processing results. "reduction_percent" is the
+            share of the text's words removed as stopwords.
         """
         doc_type = doc_type or self.default_type
+        analysis, language = self._analyze_text(text, doc_type, get_frequency, keep_tokens, as_ids)
+        
+        return self._build_result(doc_type, analysis, top_n, language)
+
+    def _analyze_text(self, text: str, doc_type: str, get_frequency: bool, keep_tokens: bool,
+                      as_ids: bool) -> Tuple[TextAnalysis, Optional[str]]:
+        """Analyze a text with the document type's processor; returns it with the detected language."""
         processor = self.get_processor(doc_type)
+        stopwords_plugin, language = self._route(processor, doc_type, text)
+        analysis = analyze(text, stopwords_plugin, remove_stopwords=True,
+                           frequencies=get_frequency, keep_tokens=keep_tokens,
+                           vocabulary=self.vocabulary if as_ids else None, backend=self.backend,
+                           tokenizer=processor.tokenizer)
+        return analysis, language
+
+    def _route(self, processor: TextProcessor, doc_type: str,
+               sample: str) -> Tuple[CustomStopwords, Optional[str]]:
+        """
+        Pick the stopwords for a document from the start of its text.
         
-        from custom_stopwords import preprocess
+        Returns:
+            (stopwords, detected language). Without languages configured it is
+            the processor's stopwords and None. Documents in no configured
+            language fall back to the processor's language.
+        """
+        stopwords_plugin = processor.stopwords_plugin
+        if self.language_index is None:
+            return stopwords_plugin, None
         
-        tokens = preprocess(text, processor.stopwords_plugin, remove_stopwords=True)
+        language = self.language_index.detect(sample) or stopwords_plugin.language
+        if language == stopwords_plugin.language:
+            return stopwords_plugin, language
         
-        result = {
-            "type": doc_type,
-            "original_length": len(text),
-            "token_count": len(tokens),
-            "unique_tokens": len(set(tokens)),
-            "tokens": tokens,
-            "reduction_percent": round((1 - len(tokens) / len(text.split())) * 100, 2) if text.split() else 0
-        }
+        routed = self._language_plugins.get((doc_type, language))
+        if routed is None:
+            # Same storage and domain overlay as the processor, other base and custom lists
+            routed = self._language_plugins[(doc_type, language)] = CustomStopwords(
+                language=language, storage_path=stopwords_plugin.storage_path,
+                overlay=stopwords_plugin.overlay_stopwords)
+        return routed, language
+
+    def _build_result(self, doc_type: str, analysis: TextAnalysis, top_n: int,
+                      language: Optional[str] = None) -> Dict:
+        """Assemble and record the result dictionary for one processed document."""
+        result = self._make_result(doc_type, analysis, top_n, language)
+        self._record(result, analysis.distinct)
+        return result
+
+    def _make_result(self, doc_type: str, analysis: TextAnalysis, top_n: int,
+                     language: Optional[str] = None) -> Dict:
+        """Assemble the result dictionary for one processed document without recording it."""
+        result = {"type": doc_type}
+        if language is not None:
+            result["language"] = language
+        result.update({
+            "original_length": analysis.length,
+            "token_count": analysis.token_count,
+            "unique_tokens": analysis.unique_count,
+        })
+        if analysis.tokens is not None:
+            result["tokens"] = analysis.tokens
+        elif analysis.token_ids is not None:
+            result["token_ids"] = analysis.token_ids
+        result["reduction_percent"] = (
+            round((1 - analysis.token_count / analysis.raw_count) * 100, 2) if analysis.raw_count else 0
+        )
         
-        if get_frequency:
-            from collections import Counter
-            freq = Counter(tokens)
-            result["top_words"] = freq.most_common(top_n)
+        if analysis.frequencies is not None:
+            result["top_words"] = analysis.frequencies.most_common(top_n)
         
-        self.results.append(result)
         return result
 
+    def _record(self, result: Dict, terms) -> None:
+        """Update the running aggregates and retain the result per the retention policy."""
+        self._stats.record(result["type"], result["token_count"], result["unique_tokens"])
+        self.term_stats.add(result["type"], terms)
+        
+        if self.retention != "none":
+            self.results.append(result)
+
     def process_file(self, file_path: str, doc_type: Optional[str] = None,
-                    get_frequency: bool = False, top_n: int = 10) -> Dict:
+                    get_frequency: bool = False, top_n: int = 10,
+                    stream: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    keep_tokens: bool = True, use_mmap: bool = False,
+                    as_ids: bool = False) -> Dict:
         """
         Process a single file.
         
@@ -89,30 +214,72 @@ class NLPPipeline:
             doc_type: Document type (uses default if None)
             get_frequency: Whether to compute word frequency
             top_n: Number of top words for frequency analysis
+            stream: Read and tokenize the file chunk by chunk instead of
+                loading it whole; results are identical
+            chunk_size: Characters per chunk in streaming mode
+            keep_tokens: Include the token list in the result
+            use_mmap: Memory-map the file and tokenize the mapped bytes
+                directly; results are identical
+            as_ids: Return tokens as an array('I') of IDs (see process_text())
         
         Returns:
             Dictionary with processing results
         """
-        doc_type = doc_type or self.default_type
+        result, terms = self._analyze_file(file_path, doc_type or self.default_type, get_frequency,
+                                           top_n, stream, chunk_size, keep_tokens, use_mmap, as_ids)
+        if "error" not in result:
+            self._record(result, terms)
+        
+        return result
+
+    def _analyze_file(self, file_path: str, doc_type: str, get_frequency: bool, top_n: int,
+                      stream: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      keep_tokens: bool = True, use_mmap: bool = False,
+                      as_ids: bool = False) -> Tuple[Dict, Optional[Collection[str]]]:
+        """Process a file without recording it; returns the result and its distinct terms."""
         processor = self.get_processor(doc_type)
+        vocabulary = self.vocabulary if as_ids else None
         
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-            
-            result = self.process_text(text, doc_type, get_frequency, top_n)
-            result["file"] = file_path
+            if (use_mmap or stream) and self.language_index is not None:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    stopwords_plugin, language = self._route(processor, doc_type,
+                                                             f.read(self.language_index.sample_size))
+            else:
+                stopwords_plugin, language = processor.stopwords_plugin, None
             
-            return result
+            if use_mmap:
+                analysis = analyze_mmap(file_path, stopwords_plugin, remove_stopwords=True,
+                                        frequencies=get_frequency, keep_tokens=keep_tokens,
+                                        vocabulary=vocabulary, backend=self.backend,
+                                        tokenizer=processor.tokenizer)
+            else:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    if stream:
+                        # Chunk by chunk, without holding the file's full text
+                        analysis = analyze(f, stopwords_plugin, remove_stopwords=True,
+                                           frequencies=get_frequency, keep_tokens=keep_tokens,
+                                           chunk_size=chunk_size, vocabulary=vocabulary,
+                                           backend=self.backend, tokenizer=processor.tokenizer)
+                    else:
+                        analysis, language = self._analyze_text(f.read(), doc_type, get_frequency,
+                                                                keep_tokens, as_ids)
         
         except FileNotFoundError:
-            return {"file": file_path, "error": "File not found"}
+            return {"file": file_path, "error": "File not found"}, None
         except Exception as e:
-            return {"file": file_path, "error": str(e)}
+            return {"file": file_path, "error": str(e)}, None
+        
+        result = self._make_result(doc_type, analysis, top_n, language)
+        result["file"] = file_path
+        
+        return result, analysis.distinct
 
     def process_directory(self, directory: str, pattern: str = "*.txt",
                          doc_type: Optional[str] = None,
-                         get_frequency: bool = False) -> List[Dict]:
+                         get_frequency: bool = False,
+                         workers: Optional[int] = None,
+                         chunksize: int = 1, as_ids: bool = False) -> List[Dict]:
         """
         Process all files matching pattern in a directory.
         
@@ -121,62 +288,555 @@ class NLPPipeline:
             pattern: File pattern (default: "*.txt")
             doc_type: Document type for all files
             get_frequency: Whether to compute word frequency
+            workers: Number of worker processes (default: process files in
+                this process). Each worker receives the document type's
+                processor, with its stopword set, once at startup.
+            chunksize: Files handed to a worker at a time
+            as_ids: Return tokens as an array('I') of IDs (see process_text());
+                worker results are encoded with self.vocabulary on arrival
         
         Returns:
-            List of results for each processed file
+            List of results for each processed file, in sorted path order
         """
         doc_type = doc_type or self.default_type
-        directory_path = Path(directory)
-        results = []
+        files = _directory_files(directory, pattern)
+        
+        if not workers or workers <= 1:
+            return [self.process_file(file_path, doc_type, get_frequency, as_ids=as_ids)
+                    for file_path in files]
+        
+        processor = self.get_processor(doc_type)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(doc_type, {doc_type: processor}, self.backend,
+                                           self.language_index)) as executor:
+            results = list(executor.map(_process_file_in_worker, files,
+                                        [get_frequency] * len(files), chunksize=chunksize))
         
-        for file_path in directory_path.glob(pattern):
-            if file_path.is_file():
-                result = self.process_file(str(file_path), doc_type, get_frequency)
-                results.append(result)
+        for index, result in enumerate(results):
+            if "error" not in result:
+                terms = set(result["tokens"])
+                if as_ids:
+                    # Workers have their own vocabularies, so IDs are only assigned here
+                    results[index] = result = self._encode_tokens(result)
+                self._record(result, terms)
         
         return results
 
-    def process_batch(self, texts: List[Tuple[str, str]]) -> List[Dict]:
+    def _encode_tokens(self, result: Dict) -> Dict:
+        """Replace a result's "tokens" with "token_ids", keeping the key order."""
+        return {
+            ("token_ids" if key == "tokens" else key):
+                (self.vocabulary.encode(value) if key == "tokens" else value)
+            for key, value in result.items()
+        }
+
+    def _result_terms(self, result: Dict) -> List[str]:
+        """Get the tokens of a result, from "tokens" or by decoding "token_ids"."""
+        if "tokens" in result:
+            return result["tokens"]
+        if "token_ids" in result:
+            return self.decode(result["token_ids"])
+        raise ValueError("Result has no tokens; process the document with keep_tokens=True")
+
+    def top_tfidf(self, result: Dict, n: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank a result's terms by TF-IDF against the pipeline's document frequencies.
+        
+        IDF is ln((1 + N) / (1 + df)) + 1 over the N documents of the
+        result's type processed so far, kept up to date as documents are
+        processed, so no pass over the corpus is needed.
+        
+        Args:
+            result: Result of process_text/process_file with "tokens" or "token_ids"
+            n: Number of terms to return
+        
+        Returns:
+            List of (term, tf-idf) tuples, highest score first
+        
+        Raises:
+            ValueError: If the result holds no tokens
+        """
+        return self.term_stats.top_tfidf(Counter(self._result_terms(result)), result["type"], n)
+
+    def top_terms(self, doc_type: Optional[str] = None, n: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get the terms that occur in the most processed documents.
+        
+        Args:
+            doc_type: Document type (all types combined if None)
+            n: Number of terms to return
+        
+        Returns:
+            List of (term, document frequency) tuples, most frequent first
+        """
+        return self.term_stats.top_terms(doc_type, n)
+
+    def save_term_stats(self, path: str) -> None:
+        """
+        Snapshot the document frequencies to a JSON file (replaced atomically).
+        
+        Args:
+            path: Snapshot file path
+        """
+        self.term_stats.save(path)
+
+    def load_term_stats(self, path: str) -> None:
+        """
+        Replace the document frequencies with a snapshot from save_term_stats().
+        
+        Args:
+            path: Snapshot file path
+        
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the snapshot version is not supported
+        """
+        self.term_stats = DocumentFrequencies.load(path)
+
+    def decode(self, token_ids) -> List[str]:
+        """
+        Turn token IDs from an as_ids result back into tokens for display.
+        
+        Args:
+            token_ids: IDs from a result's "token_ids"
+        
+        Returns:
+            List of tokens
+        """
+        return self.vocabulary.decode(token_ids)
+
+    def build_dtm(self, documents: Iterable[Union[str, os.PathLike]], doc_type: Optional[str] = None,
+                  files: bool = False, workers: Optional[int] = None, shard_size: int = 256,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> DocumentTermMatrix:
+        """
+        Vectorize a corpus into a sparse document-term matrix in one pass.
+        
+        Documents go through the document type's stopword filtering one at a
+        time and are added as rows of a CSR matrix whose columns are IDs of
+        self.vocabulary. Only the matrix itself grows with the corpus; files
+        are read in chunks and each document's tokens are dropped once
+        counted. Documents are not added to results or pipeline statistics.
+        
+        Args:
+            documents: Texts, or file paths when files is True (os.PathLike
+                items such as Path objects are always read as files)
+            doc_type: Document type for all documents (uses default if None)
+            files: Treat str items as file paths instead of texts
+            workers: Number of worker processes (default: work in this
+                process). Each worker vectorizes shards of shard_size
+                documents with its own vocabulary; shards are merged into
+                self.vocabulary in order, so the result is the same as
+                without workers.
+            shard_size: Documents per worker task
+            chunk_size: Characters per chunk when reading files
+        
+        Returns:
+            DocumentTermMatrix (indptr/indices/data/shape) with the pipeline's
+            vocabulary; row i is the i-th document
+        
+        Raises:
+            FileNotFoundError: If a file doesn't exist
+        """
+        doc_type = doc_type or self.default_type
+        processor = self.get_processor(doc_type)
+        
+        if not workers or workers <= 1:
+            builder = MatrixBuilder(self.backend)
+            _add_dtm_rows(builder, documents, processor, self.vocabulary,
+                          files, chunk_size)
+            return builder.build(self.vocabulary)
+        
+        builder = MatrixBuilder(self.backend)
+        remaining = iter(documents)
+        shards = iter(lambda: list(islice(remaining, shard_size)), [])
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(doc_type, {doc_type: processor}, self.backend, None)) as executor:
+            for shard in _bounded_map(executor, _dtm_shard_in_worker, shards, 2 * workers,
+                                      files, chunk_size):
+                # Add shard tokens in their first-seen order so IDs match a sequential run
+                tokens = list(shard.vocabulary)
+                self.vocabulary.add(tokens)
+                builder.add_matrix(shard, self.vocabulary.encode(tokens))
+        
+        return builder.build(self.vocabulary)
+
+    def process_batch(self, texts: List[Tuple[str, str]], as_ids: bool = False) -> List[Dict]:
         """
         Process multiple texts with potentially different types.
         
+        With languages configured, each text is filtered with the stopwords
+        of its own detected language, so one batch can mix languages.
+        
         Args:
             texts: List of (text, doc_type) tuples
+            as_ids: Return tokens as an array('I') of IDs (see process_text())
         
         Returns:
             List of processing results
         """
         results = []
         for text, doc_type in texts:
-            result = self.process_text(text, doc_type)
+            result = self.process_text(text, doc_type, as_ids=as_ids)
             results.append(result)
         return results
 
+    def process_executor(self, workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """
+        Create a process pool for the async methods' executor argument.
+        
+        Each worker receives the pipeline's current processors once, at
+        startup; other document types are created in the worker as needed.
+        The caller owns the pool and should shut it down.
+        
+        Args:
+            workers: Number of worker processes (default: one per CPU)
+        
+        Returns:
+            ProcessPoolExecutor set up for this pipeline
+        """
+        self.get_processor(self.default_type)
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(self.default_type, dict(self.processors), self.backend,
+                                                 self.language_index))
+        self._process_executors.add(executor)
+        return executor
+
+    async def aprocess_file(self, file_path: str, doc_type: Optional[str] = None,
+                            get_frequency: bool = False, top_n: int = 10,
+                            keep_tokens: bool = True, use_mmap: bool = False, as_ids: bool = False,
+                            executor: Optional[Executor] = None) -> Dict:
+        """
+        Process a single file without blocking the event loop.
+        
+        Reading and tokenizing run in an executor, and the result is
+        recorded on the event loop's thread. At most self.concurrency
+        documents are in the executor at once across all async calls on
+        this pipeline; further calls wait for a free slot.
+        
+        Args:
+            file_path: Path to text file
+            doc_type: Document type (uses default if None)
+            get_frequency: Whether to compute word frequency
+            top_n: Number of top words for frequency analysis
+            keep_tokens: Include the token list in the result
+            use_mmap: Memory-map the file (see process_file())
+            as_ids: Return tokens as an array('I') of IDs (see process_text())
+            executor: Executor to run in (default: a thread pool owned by the
+                pipeline; process pools must come from process_executor())
+        
+        Returns:
+            Dictionary with processing results, as from process_file()
+        
+        Raises:
+            ValueError: If executor is a process pool not created by process_executor()
+        """
+        return await self._run_async("file", file_path, doc_type or self.default_type, get_frequency,
+                                     top_n, keep_tokens, use_mmap, as_ids, executor)
+
+    async def aprocess_text(self, text: str, doc_type: Optional[str] = None,
+                            get_frequency: bool = False, top_n: int = 10,
+                            keep_tokens: bool = True, as_ids: bool = False,
+                            executor: Optional[Executor] = None) -> Dict:
+        """
+        Process a single text without blocking the event loop (see aprocess_file()).
+        
+        Returns:
+            Dictionary with processing results, as from process_text()
+        """
+        return await self._run_async("text", text, doc_type or self.default_type, get_frequency,
+                                     top_n, keep_tokens, False, as_ids, executor)
+
+    async def aiter_directory(self, directory: str, pattern: str = "*.txt",
+                              doc_type: Optional[str] = None, get_frequency: bool = False,
+                              as_ids: bool = False,
+                              executor: Optional[Executor] = None) -> AsyncIterator[Dict]:
+        """
+        Process the files of a directory, yielding results as they complete.
+        
+        Use with async for. Only self.concurrency files are in flight at a
+        time, and no new file is started while the consumer is not reading,
+        so slow consumers apply backpressure.
+        
+        Args:
+            directory: Path to directory
+            pattern: File pattern (default: "*.txt")
+            doc_type: Document type for all files
+            get_frequency: Whether to compute word frequency
+            as_ids: Return tokens as an array('I') of IDs (see process_text())
+            executor: Executor to run in (see aprocess_file())
+        
+        Yields:
+            Result dictionaries, in completion order
+        """
+        doc_type = doc_type or self.default_type
+        files = await self._list_files(directory, pattern, executor)
+        calls = (partial(self.aprocess_file, file_path, doc_type, get_frequency, as_ids=as_ids,
+                         executor=executor)
+                 for file_path in files)
+        async for _, result in _as_completed(calls, self.concurrency):
+            yield result
+
+    async def aprocess_directory(self, directory: str, pattern: str = "*.txt",
+                                 doc_type: Optional[str] = None, get_frequency: bool = False,
+                                 as_ids: bool = False, executor: Optional[Executor] = None) -> List[Dict]:
+        """
+        Process all files matching pattern in a directory without blocking the event loop.
+        
+        Args:
+            directory: Path to directory
+            pattern: File pattern (default: "*.txt")
+            doc_type: Document type for all files
+            get_frequency: Whether to compute word frequency
+            as_ids: Return tokens as an array('I') of IDs (see process_text())
+            executor: Executor to run in (see aprocess_file())
+        
+        Returns:
+            List of results for each processed file, in sorted path order
+        """
+        doc_type = doc_type or self.default_type
+        files = await self._list_files(directory, pattern, executor)
+        calls = (partial(self.aprocess_file, file_path, doc_type, get_frequency, as_ids=as_ids,
+                         executor=executor)
+                 for file_path in files)
+        return await _gather_in_order(calls, self.concurrency)
+
+    async def aiter_batch(self, texts: Iterable[Tuple[str, str]], as_ids: bool = False,
+                          executor: Optional[Executor] = None) -> AsyncIterator[Dict]:
+        """
+        Process (text, doc_type) pairs, yielding results as they complete.
+        
+        Texts are taken from the iterable only as slots free up (see
+        aiter_directory()).
+        
+        Args:
+            texts: Iterable of (text, doc_type) tuples
+            as_ids: Return tokens as an array('I') of IDs (see process_text())
+            executor: Executor to run in (see aprocess_file())
+        
+        Yields:
+            Result dictionaries, in completion order
+        """
+        calls = (partial(self.aprocess_text, text, doc_type, as_ids=as_ids, executor=executor)
+                 for text, doc_type in texts)
+        async for _, result in _as_completed(calls, self.concurrency):
+            yield result
+
+    async def aprocess_batch(self, texts: Iterable[Tuple[str, str]], as_ids: bool = False,
+                             executor: Optional[Executor] = None) -> List[Dict]:
+        """
+        Process multiple texts without blocking the event loop.
+        
+        Args:
+            texts: Iterable of (text, doc_type) tuples
+            as_ids: Return tokens as an array('I') of IDs (see process_text())
+            executor: Executor to run in (see aprocess_file())
+        
+        Returns:
+            List of processing results, in input order
+        """
+        calls = (partial(self.aprocess_text, text, doc_type, as_ids=as_ids, executor=executor)
+                 for text, doc_type in texts)
+        return await _gather_in_order(calls, self.concurrency)
+
+    async def _run_async(self, kind: str, item: str, doc_type: str, get_frequency: bool, top_n: int,
+                         keep_tokens: bool, use_mmap: bool, as_ids: bool,
+                         executor: Optional[Executor]) -> Dict:
+        """Analyze one file or text in an executor and record the result on the loop's thread."""
+        loop = asyncio.get_running_loop()
+        limit = self._limits.get(loop)
+        if limit is None:
+            limit = self._limits[loop] = asyncio.Semaphore(self.concurrency)
+        executor = self._executor(executor)
+        
+        if isinstance(executor, ProcessPoolExecutor):
+            # Worker vocabularies differ from this one, so IDs are assigned here
+            call = partial(_analyze_in_worker, kind, item, doc_type, get_frequency, top_n,
+                           keep_tokens, use_mmap)
+        else:
+            self.get_processor(doc_type)
+            if kind == "file":
+                call = partial(self._analyze_file, item, doc_type, get_frequency, top_n,
+                               keep_tokens=keep_tokens, use_mmap=use_mmap, as_ids=as_ids)
+            else:
+                call = partial(self._analyze_text_result, item, doc_type, get_frequency, top_n,
+                               keep_tokens, as_ids)
+        
+        async with limit:
+            result, terms = await loop.run_in_executor(executor, call)
+        
+        if "error" not in result:
+            if as_ids and "tokens" in result:
+                result = self._encode_tokens(result)
+            self._record(result, terms)
+        
+        return result
+
+    def _executor(self, executor: Optional[Executor]) -> Executor:
+        """
+        Get the executor for an async call, starting the pipeline's thread pool if none is given.
+        
+        Raises:
+            ValueError: If a process pool was not created by process_executor()
+        """
+        if executor is None:
+            if self._thread_executor is None:
+                self._thread_executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                                           thread_name_prefix="nlp-pipeline")
+            return self._thread_executor
+        if isinstance(executor, ProcessPoolExecutor) and executor not in self._process_executors:
+            raise ValueError("Process pools must be created with process_executor(), "
+                             "which sets up this pipeline in each worker")
+        return executor
+
+    async def _list_files(self, directory: str, pattern: str,
+                          executor: Optional[Executor]) -> List[str]:
+        """List a directory's matching files in an executor, keeping the stat calls off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor(executor),
+                                                                _directory_files, directory, pattern)
+
+    def _analyze_text_result(self, text: str, doc_type: str, get_frequency: bool, top_n: int,
+                             keep_tokens: bool, as_ids: bool) -> Tuple[Dict, Collection[str]]:
+        """Process a text without recording it; returns the result and its distinct terms."""
+        analysis, language = self._analyze_text(text, doc_type, get_frequency, keep_tokens, as_ids)
+        return self._make_result(doc_type, analysis, top_n, language), analysis.distinct
+
+    def close(self) -> None:
+        """Shut down the thread pool used by the async methods, if one was started."""
+        if self._thread_executor is not None:
+            self._thread_executor.shutdown()
+            self._thread_executor = None
+
     def get_pipeline_stats(self) -> Dict:
         """
         Get statistics about the pipeline processing.
         
+        Statistics come from running aggregates updated as documents are
+        processed, so the call takes constant time and covers every processed
+        document whatever the retention policy.
+        
         Returns:
-            Dictionary with pipeline statistics
+            Dictionary with pipeline statistics, including min/max/percentiles
+            of tokens per document and a per-type breakdown under "by_type"
         """
-        if not self.results:
+        if not self._stats.documents:
             return {"message": "No results yet"}
         
-        total_tokens = sum(r.get("token_count", 0) for r in self.results)
-        total_unique = sum(r.get("unique_tokens", 0) for r in self.results)
-        
-        return {
-            "total_documents": len(self.results),
-            "total_tokens": total_tokens,
-            "total_unique_tokens": total_unique,
-            "avg_tokens_per_doc": round(total_tokens / len(self.results), 2),
-            "document_types": list(set(r.get("type") for r in self.results if "type" in r))
-        }
+        return self._stats.summary()
 
     def reset(self):
-        """Clear all results from the pipeline"""
-        self.results = []
+        """Clear all results and statistics from the pipeline"""
+        self.results: Union[List[Dict], Deque[Dict]] = (
+            deque(maxlen=self.max_results) if self.retention == "ring" else []
+        )
+        self._stats = PipelineStats()
+        self.term_stats = DocumentFrequencies()
 
     def available_document_types(self) -> List[str]:
         """Get list of available document types"""
         return ProcessorRegistry.list_types()
+
+
+# Pipeline used inside worker processes started by process_directory()
+_worker_pipeline: Optional[NLPPipeline] = None
+
+
+def _init_worker(doc_type: str, processors: Dict[str, TextProcessor], backend: str,
+                 language_index: Optional[MultiLanguageStopwords]) -> None:
+    """Set up a pipeline with the parent's processors and languages once per worker process."""
+    global _worker_pipeline
+    _worker_pipeline = NLPPipeline(default_type=doc_type, retention="none", backend=backend)
+    _worker_pipeline.processors.update(processors)
+    _worker_pipeline.language_index = language_index
+
+
+def _process_file_in_worker(file_path: str, get_frequency: bool) -> Dict:
+    """Process one file in a worker process without recording it; the parent records the result."""
+    result, _ = _worker_pipeline._analyze_file(file_path, _worker_pipeline.default_type,
+                                               get_frequency, top_n=10)
+    return result
+
+
+def _dtm_shard_in_worker(documents: List, files: bool, chunk_size: int) -> DocumentTermMatrix:
+    """Vectorize one shard of documents with a shard-local vocabulary."""
+    processor = _worker_pipeline.get_processor(_worker_pipeline.default_type)
+    builder = MatrixBuilder(_worker_pipeline.backend)
+    vocabulary = Vocabulary()
+    _add_dtm_rows(builder, documents, processor, vocabulary, files, chunk_size)
+    return builder.build(vocabulary)
+
+
+def _add_dtm_rows(builder: MatrixBuilder, documents: Iterable, processor: TextProcessor,
+                  vocabulary: Vocabulary, files: bool, chunk_size: int) -> None:
+    """Analyze documents one by one into token IDs and add each as a matrix row."""
+    for document in documents:
+        if files or isinstance(document, os.PathLike):
+            with open(document, "r", encoding="utf-8") as f:
+                analysis = analyze(f, processor.stopwords_plugin, chunk_size=chunk_size,
+                                   vocabulary=vocabulary, backend=builder.backend,
+                                   tokenizer=processor.tokenizer)
+        else:
+            analysis = analyze(document, processor.stopwords_plugin, vocabulary=vocabulary,
+                               backend=builder.backend, tokenizer=processor.tokenizer)
+        builder.add_document(analysis.token_ids)
+
+
+def _bounded_map(executor: ProcessPoolExecutor, func: Callable, items: Iterator,
+                 window: int, *args) -> Iterator:
+    """Like executor.map, but with at most window tasks submitted at a time."""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _analyze_in_worker(kind: str, item: str, doc_type: str, get_frequency: bool, top_n: int,
+                       keep_tokens: bool, use_mmap: bool) -> Tuple[Dict, Optional[set]]:
+    """Analyze one file or text for the async methods in a worker process."""
+    if kind == "file":
+        result, terms = _worker_pipeline._analyze_file(item, doc_type, get_frequency, top_n,
+                                                       keep_tokens=keep_tokens, use_mmap=use_mmap)
+    else:
+        result, terms = _worker_pipeline._analyze_text_result(item, doc_type, get_frequency, top_n,
+                                                              keep_tokens, False)
+    # Dictionary key views can't be pickled back to the parent
+    return result, set(terms) if terms is not None else None
+
+
+def _directory_files(directory: str, pattern: str) -> List[str]:
+    """Files in a directory matching pattern, in sorted path order."""
+    return sorted(str(file_path) for file_path in Path(directory).glob(pattern) if file_path.is_file())
+
+
+async def _as_completed(calls: Iterable[Callable[[], Awaitable]],
+                        limit: int) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Run coroutine functions with at most limit in flight, yielding
+    (index, result) pairs as they complete. Calls are started lazily, and
+    unfinished ones are cancelled if the consumer stops early.
+    """
+    pending = {}
+    try:
+        for index, call in enumerate(calls):
+            pending[asyncio.ensure_future(call())] = index
+            if len(pending) >= limit:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield pending.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _gather_in_order(calls: Iterable[Callable[[], Awaitable]], limit: int) -> List[Dict]:
+    """Run coroutine functions with at most limit in flight; results in call order."""
+    results = {}
+    async for index, result in _as_completed(calls, limit):
+        results[index] = result
+    return [results[index] for index in range(len(results))]
@@ -0,0 +1,164 @@
+"""
+Pipeline Statistics - Running aggregates for NLPPipeline
+Keeps counts, sums, per-type breakdowns and token-count percentiles without retaining results
+"""
+
+import math
+from typing import Dict, Optional
+
+
+class TokenCountSketch:
+    """
+    Streaming quantile sketch for non-negative counts.
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within relative_accuracy of the true value while memory depends only on
+    the range of values seen, not on how many were added.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of reported quantiles
+        """
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Add one value to the sketch."""
+        self.count += 1
+        if value <= 0:
+            self._zeros += 1
+            return
+
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[key] = self._buckets.get(key, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile of the values added so far.
+
+        Args:
+            q: Quantile between 0 and 1 (e.g. 0.5 for the median)
+
+        Returns:
+            Estimated value, or 0 if the sketch is empty
+        """
+        if not self.count:
+            return 0
+
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0
+
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen > rank:
+                return 2 * self._gamma ** key / (self._gamma + 1)
+
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+
+class _Aggregate:
+    """Running totals for one group of documents."""
+
+    __slots__ = ("documents", "tokens", "unique_tokens", "min_tokens", "max_tokens", "sketch")
+
+    def __init__(self, relative_accuracy: float):
+        self.documents = 0
+        self.tokens = 0
+        self.unique_tokens = 0
+        self.min_tokens: Optional[int] = None
+        self.max_tokens: Optional[int] = None
+        self.sketch = TokenCountSketch(relative_accuracy)
+
+    def add(self, token_count: int, unique_tokens: int) -> None:
+        self.documents += 1
+        self.tokens += token_count
+        self.unique_tokens += unique_tokens
+        self.min_tokens = token_count if self.min_tokens is None else min(self.min_tokens, token_count)
+        self.max_tokens = token_count if self.max_tokens is None else max(self.max_tokens, token_count)
+        self.sketch.add(token_count)
+
+    def percentile(self, q: float) -> float:
+        # The sketch is approximate; exact min/max bound its estimates
+        return round(min(max(self.sketch.quantile(q), self.min_tokens), self.max_tokens), 2)
+
+    def summary(self) -> Dict:
+        return {
+            "documents": self.documents,
+            "total_tokens": self.tokens,
+            "total_unique_tokens": self.unique_tokens,
+            "avg_tokens_per_doc": round(self.tokens / self.documents, 2),
+            "min_tokens_per_doc": self.min_tokens,
+            "max_tokens_per_doc": self.max_tokens,
+            "tokens_per_doc_percentiles": {
+                f"p{int(q * 100)}": self.percentile(q) for q in PipelineStats.PERCENTILES
+            },
+        }
+
+
+class PipelineStats:
+    """
+    Running aggregates over every document processed by a pipeline.
+
+    record() is O(1) and summary() costs the same however many documents
+    were processed, so dashboards can poll it freely.
+    """
+
+    PERCENTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        Initialize empty statistics.
+
+        Args:
+            relative_accuracy: Relative error of the tokens-per-document percentiles
+        """
+        self.relative_accuracy = relative_accuracy
+        self._overall = _Aggregate(relative_accuracy)
+        self._by_type: Dict[str, _Aggregate] = {}
+
+    @property
+    def documents(self) -> int:
+        """Number of documents recorded."""
+        return self._overall.documents
+
+    def record(self, doc_type: str, token_count: int, unique_tokens: int) -> None:
+        """
+        Add one processed document to the aggregates.
+
+        Args:
+            doc_type: Document type the document was processed as
+            token_count: Number of tokens kept after filtering
+            unique_tokens: Number of distinct kept tokens
+        """
+        self._overall.add(token_count, unique_tokens)
+
+        aggregate = self._by_type.get(doc_type)
+        if aggregate is None:
+            aggregate = self._by_type[doc_type] = _Aggregate(self.relative_accuracy)
+        aggregate.add(token_count, unique_tokens)
+
+    def summary(self) -> Dict:
+        """
+        Get the current aggregates.
+
+        Returns:
+            Dictionary with overall totals, min/max/percentiles of tokens per
+            document and a per-document-type breakdown
+        """
+        overall = self._overall.summary()
+        return {
+            "total_documents": overall.pop("documents"),
+            **overall,
+            "document_types": list(self._by_type),
+            "by_type": {doc_type: aggregate.summary() for doc_type, aggregate in self._by_type.items()},
+        }
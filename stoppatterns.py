@@ -0,0 +1,147 @@
+"""
+Stop Patterns - Wildcard and regex stopwords compiled into one memoized matcher
+Treats tokens such as URLs, numbers and hashes as stopwords without listing each one
+"""
+
+import re
+from functools import lru_cache
+from itertools import filterfalse
+from typing import Callable, Dict, FrozenSet, Iterable, List
+
+# Patterns with this prefix are regular expressions; all others are wildcards
+REGEX_PREFIX = "re:"
+
+# Distinct words whose match result is remembered before the memo is reset
+DEFAULT_MEMO_SIZE = 1 << 18
+
+
+def normalize_pattern(pattern: str) -> str:
+    """
+    Validate a pattern and get its canonical form.
+
+    Wildcard patterns use * (any characters) and ? (one character) and are
+    lowercased like tokens; "re:" patterns are regular expressions. Either
+    kind must match a whole token.
+
+    Raises:
+        ValueError: If the pattern is empty or not a valid regular expression
+    """
+    pattern = pattern.strip()
+    if not pattern.startswith(REGEX_PREFIX):
+        pattern = pattern.lower()
+    expression = pattern_regex(pattern)
+    if not expression:
+        raise ValueError("Stopword patterns must not be empty")
+    try:
+        re.compile(expression)
+    except re.error as e:
+        raise ValueError(f"Invalid stopword pattern '{pattern}': {e}") from None
+    return pattern
+
+
+def pattern_regex(pattern: str) -> str:
+    """Get the regular expression for a normalized pattern."""
+    if pattern.startswith(REGEX_PREFIX):
+        return pattern[len(REGEX_PREFIX):]
+    return "".join(".*" if char == "*" else "." if char == "?" else re.escape(char)
+                   for char in pattern)
+
+
+def _combinable(expression: str) -> bool:
+    """
+    Check whether a regular expression can join the shared alternation.
+
+    Expressions with capturing groups can't: group names would clash and
+    backreferences would point at other patterns' groups once the numbers
+    shift. Neither can global inline flags such as (?i), which must start
+    the whole expression.
+    """
+    try:
+        return re.compile(f"(?:{expression})").groups == 0
+    except re.error:
+        return False
+
+
+class PatternMatcher:
+    """
+    All stopword patterns of a set, compiled into a single regular expression.
+
+    Patterns with capturing groups or global inline flags are compiled on
+    their own instead (see _combinable()), so every pattern matches exactly
+    as it would alone. Match results are memoized per distinct word, so the
+    regexes run once per vocabulary word rather than once per token;
+    repeated tokens cost one dictionary lookup. The matcher is meant to be
+    consulted only for words that missed the exact stopword set.
+    """
+
+    def __init__(self, patterns: Iterable[str], memo_size: int = DEFAULT_MEMO_SIZE):
+        """
+        Compile the patterns.
+
+        Args:
+            patterns: Patterns in normalized form (see normalize_pattern())
+            memo_size: Distinct words remembered before the memo is reset
+        """
+        self.patterns = tuple(sorted(set(patterns)))
+        self.memo_size = memo_size
+        combined = []
+        self._fullmatches: List[Callable] = []
+        for expression in map(pattern_regex, self.patterns):
+            if _combinable(expression):
+                combined.append(f"(?:{expression})")
+            else:
+                self._fullmatches.append(re.compile(expression).fullmatch)
+        if combined:
+            self._fullmatches.insert(0, re.compile("|".join(combined)).fullmatch)
+        self._memo: Dict[str, bool] = {}
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def matches(self, word: str) -> bool:
+        """Check whether a lowercase word matches any pattern."""
+        memo = self._memo
+        matched = memo.get(word)
+        if matched is None:
+            if len(memo) >= self.memo_size:
+                memo = self._memo = {}
+            matched = memo[word] = self._match(word)
+        return matched
+
+    def _match(self, word: str) -> bool:
+        """Run the compiled expressions on a word, without the memo."""
+        return any(fullmatch(word) is not None for fullmatch in self._fullmatches)
+
+    def remove(self, words: List[str]) -> List[str]:
+        """
+        Remove the words matching any pattern.
+
+        Args:
+            words: Lowercase words, usually those that are not exact stopwords
+
+        Returns:
+            The words that match no pattern, in order
+        """
+        memo = self._memo
+        unseen = set(words).difference(memo)
+        if unseen:
+            if len(memo) + len(unseen) > self.memo_size:
+                # A fresh dict rather than clear(), so threads reading the old one still find their words
+                memo = self._memo = {}
+                unseen = set(words)
+            match = self._match
+            memo.update((word, match(word)) for word in unseen)
+        return list(filterfalse(memo.__getitem__, words))
+
+    def __getstate__(self):
+        # Pickled copies (e.g. sent to worker processes) start with an empty memo
+        return {"patterns": self.patterns, "memo_size": self.memo_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["patterns"], state["memo_size"])
+
+
+@lru_cache(maxsize=64)
+def compile_patterns(patterns: FrozenSet[str]) -> PatternMatcher:
+    """Get the matcher for a set of patterns, shared by every instance using the same set."""
+    return PatternMatcher(patterns)
@@ -0,0 +1,167 @@
+"""
+Stopphrases - Multi-word stopword removal with an Aho-Corasick automaton over token IDs
+Removes any number of phrases such as "according to" in one linear pass over the words
+"""
+
+from collections import deque
+from functools import lru_cache
+from itertools import compress
+from typing import Dict, FrozenSet, Iterable, List
+
+from tokenization import DEFAULT_TOKENIZER
+from vocabulary import Vocabulary
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Lowercase and tokenize a phrase into its canonical space-separated form."""
+    return " ".join(DEFAULT_TOKENIZER.tokenize(phrase))
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton that finds stopphrases in a sequence of words.
+
+    The phrase words are interned to integer IDs and the automaton's
+    transitions are keyed by those IDs, so each input word costs one
+    dictionary probe to map to an ID plus amortized O(1) transitions,
+    however many phrases there are. Every word covered by at least one
+    phrase occurrence is removed, including overlapping occurrences.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        """
+        Compile the automaton.
+
+        Args:
+            phrases: Phrases in normalized form (see normalize_phrase())
+        """
+        sequences = sorted({tuple(phrase.split()) for phrase in phrases} - {()})
+        self.phrases = tuple(" ".join(sequence) for sequence in sequences)
+        self._vocabulary = Vocabulary(word for sequence in sequences for word in sequence)
+        # No phrase can match in words that contain none of the first words
+        self._starts = frozenset(sequence[0] for sequence in sequences)
+
+        # Trie over phrase word IDs: transitions, depth and the longest phrase ending at each state
+        goto: List[Dict[int, int]] = [{}]
+        depth = [0]
+        longest = [0]
+        for sequence in sequences:
+            state = 0
+            for symbol in map(self._vocabulary.id_of, sequence):
+                child = goto[state].get(symbol)
+                if child is None:
+                    child = goto[state][symbol] = len(goto)
+                    goto.append({})
+                    depth.append(depth[state] + 1)
+                    longest.append(0)
+                state = child
+            longest[state] = len(sequence)
+
+        # Failure links in breadth-first order; a state also reports the
+        # phrases ending at its longest proper suffix state
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, child in goto[state].items():
+                queue.append(child)
+                suffix = fail[state]
+                while suffix and symbol not in goto[suffix]:
+                    suffix = fail[suffix]
+                fail[child] = goto[suffix].get(symbol, 0)
+                longest[child] = max(longest[child], longest[fail[child]])
+
+        self._goto = goto
+        self._fail = fail
+        self._depth = depth
+        self._longest = longest
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def stream(self) -> "PhraseStream":
+        """Start removing phrases from words that arrive in pieces (e.g. per chunk)."""
+        return PhraseStream(self)
+
+    def remove(self, words: List[str]) -> List[str]:
+        """
+        Remove every phrase occurrence from a complete word sequence.
+
+        Args:
+            words: Lowercase words
+
+        Returns:
+            The words not covered by any phrase
+        """
+        stream = self.stream()
+        kept = stream.feed(words)
+        tail = stream.close()
+        return kept + tail if tail else kept
+
+
+class PhraseStream:
+    """
+    Removes phrases from consecutive pieces of one word sequence.
+
+    Words that could still begin a phrase continuing into the next piece
+    are held back until it arrives (or close() is called), so phrases
+    spanning chunk boundaries are removed exactly as in the whole text.
+    """
+
+    __slots__ = ("_matcher", "_state", "_pending", "_keep")
+
+    def __init__(self, matcher: PhraseMatcher):
+        self._matcher = matcher
+        self._state = 0
+        self._pending: List[str] = []
+        self._keep = bytearray()
+
+    def feed(self, words: List[str]) -> List[str]:
+        """
+        Add the next piece of words.
+
+        Returns:
+            Words that are now known to be outside every phrase, in order
+        """
+        matcher = self._matcher
+        # The state is the root exactly when nothing is held back
+        if not self._state and matcher._starts.isdisjoint(words):
+            return words
+
+        words = self._pending + words
+        keep = self._keep + b"\x01" * (len(words) - len(self._pending))
+        ids = matcher._vocabulary.id_of
+        goto, fail, longest = matcher._goto, matcher._fail, matcher._longest
+        state = self._state
+
+        for position in range(len(self._pending), len(words)):
+            symbol = ids(words[position])
+            if symbol is None:
+                state = 0
+                continue
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            length = longest[state]
+            if length:
+                keep[position - length + 1:position + 1] = bytes(length)
+
+        cut = len(words) - matcher._depth[state]
+        self._state = state
+        self._pending = words[cut:]
+        self._keep = keep[cut:]
+        return list(compress(words[:cut], keep[:cut]))
+
+    def close(self) -> List[str]:
+        """Get the held-back words outside every phrase once the sequence has ended."""
+        kept = list(compress(self._pending, self._keep))
+        self._state = 0
+        self._pending = []
+        self._keep = bytearray()
+        return kept
+
+
+@lru_cache(maxsize=64)
+def compile_phrases(phrases: FrozenSet[str]) -> PhraseMatcher:
+    """Get the automaton for a set of phrases, shared by every instance using the same set."""
+    return PhraseMatcher(phrases)
@@ -0,0 +1,300 @@
+"""
+Stopword Store - Process-wide cache of base and custom stopword lists
+Shared by all CustomStopwords instances so NLTK data and JSON storage are loaded once
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from atomic_write import write_json
+
+# Precompiled base stopword lists written by StopwordStore.write_snapshot().
+# When the file exists, base lists are read from it and NLTK is never imported.
+DEFAULT_SNAPSHOT_PATH = os.environ.get(
+    "NLP_STOPWORDS_SNAPSHOT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "stopwords_snapshot.json"),
+)
+
+SNAPSHOT_VERSION = 1
+
+# Every top-level key of a storage file is a language, except this reserved
+# one, which holds the sections below
+SECTIONS_KEY = "_sections"
+
+# Sections holding the custom stopphrases and stop patterns of each language,
+# and the domain overlay terms of each document type
+STOPPHRASES_KEY = "stopphrases"
+STOPPATTERNS_KEY = "stoppatterns"
+OVERLAYS_KEY = "overlays"
+
+
+class _CachedDocument:
+    """Parsed contents of one storage file plus its file stamp and reference count."""
+
+    __slots__ = ("stamp", "data", "sets", "refcount")
+
+    def __init__(self, stamp: Tuple[int, int], data: Dict[str, List[str]]):
+        self.stamp = stamp
+        self.data = data
+        # Keyed by language for stopwords and (section, name) for section entries
+        self.sets: Dict[Union[str, Tuple[str, str]], FrozenSet[str]] = {}
+        self.refcount = 0
+
+
+class StopwordStore:
+    """
+    Process-wide, reference-counted cache of stopword lists.
+
+    Base NLTK stopwords are cached per language for the lifetime of the
+    process. They come from the snapshot at snapshot_path when it has the
+    language, and from NLTK (imported on first use) otherwise. Parsed storage files are cached per absolute path, kept while
+    at least one CustomStopwords instance holds a reference, and reloaded
+    only when the file's mtime or size changes.
+
+    All cached sets are frozensets, so instances share them freely and
+    build a new set when they modify their own copy (copy-on-write).
+    """
+
+    _lock = threading.RLock()
+    _base: Dict[str, FrozenSet[str]] = {}
+    _snapshot: Optional[Dict[str, List[str]]] = None
+    snapshot_path: Optional[str] = DEFAULT_SNAPSHOT_PATH
+    _documents: Dict[str, _CachedDocument] = {}
+    _merged: "OrderedDict[Tuple[FrozenSet[str], ...], FrozenSet[str]]" = OrderedDict()
+    max_merged_stacks = 64
+
+    @classmethod
+    def base_stopwords(cls, language: str) -> FrozenSet[str]:
+        """Get the NLTK stopword list for a language, loading it on first use."""
+        with cls._lock:
+            if language not in cls._base:
+                words = cls._snapshot_languages().get(language)
+                if words is None:
+                    from nltk.corpus import stopwords
+
+                    words = stopwords.words(language)
+                cls._base[language] = frozenset(words)
+            return cls._base[language]
+
+    @classmethod
+    def use_snapshot(cls, path: Optional[str]) -> None:
+        """
+        Read base stopwords from a different snapshot file.
+
+        Lists already loaded stay as they are for existing instances; new
+        instances get the lists from the new source.
+
+        Args:
+            path: File written by write_snapshot(), or None to always use NLTK
+        """
+        with cls._lock:
+            cls.snapshot_path = path
+            cls._snapshot = None
+            cls._base.clear()
+
+    @classmethod
+    def write_snapshot(cls, path: Optional[str] = None,
+                       languages: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Precompile NLTK base stopword lists into a snapshot file.
+
+        Ship the file with the application (the default path sits next to
+        this module) so processors start without importing NLTK or looking
+        up its data. The file is replaced atomically.
+
+        Args:
+            path: Output file (default: snapshot_path)
+            languages: Languages to include (default: every NLTK language)
+
+        Returns:
+            Languages written
+        """
+        from nltk.corpus import stopwords
+
+        path = path or cls.snapshot_path
+        languages = sorted(languages if languages is not None else stopwords.fileids())
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "languages": {language: sorted(set(stopwords.words(language))) for language in languages},
+        }
+        write_json(path, data, ensure_ascii=False)
+
+        with cls._lock:
+            if os.path.abspath(path) == os.path.abspath(cls.snapshot_path or ""):
+                cls._snapshot = None
+        return languages
+
+    @classmethod
+    def acquire(cls, storage_path: str) -> None:
+        """
+        Take a reference to a storage file, loading it if it isn't cached.
+
+        Args:
+            storage_path: Path to the JSON file storing custom stopwords
+        """
+        with cls._lock:
+            cls._document(storage_path).refcount += 1
+
+    @classmethod
+    def release(cls, storage_path: str) -> None:
+        """Drop a reference taken with acquire(); unreferenced files are evicted."""
+        key = os.path.abspath(storage_path)
+        with cls._lock:
+            document = cls._documents.get(key)
+            if document is None:
+                return
+            document.refcount -= 1
+            if document.refcount <= 0:
+                del cls._documents[key]
+
+    @classmethod
+    def custom_stopwords(cls, storage_path: str, language: str) -> FrozenSet[str]:
+        """Get the custom stopwords stored for a language as a shared frozen set."""
+        with cls._lock:
+            document = cls._document(storage_path)
+            if language not in document.sets:
+                document.sets[language] = frozenset(document.data.get(language, []))
+            return document.sets[language]
+
+    @classmethod
+    def languages(cls, storage_path: str) -> List[str]:
+        """Get the languages a storage file has custom stopwords for."""
+        with cls._lock:
+            return [key for key in cls._document(storage_path).data if key != SECTIONS_KEY]
+
+    @classmethod
+    def domain_overlay(cls, storage_path: str, doc_type: str) -> FrozenSet[str]:
+        """Get the domain terms stored for a document type as a shared frozen set."""
+        return cls._section_set(storage_path, OVERLAYS_KEY, doc_type)
+
+    @classmethod
+    def custom_stopphrases(cls, storage_path: str, language: str) -> FrozenSet[str]:
+        """Get the stopphrases stored for a language as a shared frozen set."""
+        return cls._section_set(storage_path, STOPPHRASES_KEY, language)
+
+    @classmethod
+    def custom_stoppatterns(cls, storage_path: str, language: str) -> FrozenSet[str]:
+        """Get the stopword patterns stored for a language as a shared frozen set."""
+        return cls._section_set(storage_path, STOPPATTERNS_KEY, language)
+
+    @classmethod
+    def _section_set(cls, storage_path: str, section: str, name: str) -> FrozenSet[str]:
+        """Get a language's or document type's entries in a storage file section as a shared frozen set."""
+        key = (section, name)
+        with cls._lock:
+            document = cls._document(storage_path)
+            if key not in document.sets:
+                entries = document.data.get(SECTIONS_KEY, {}).get(section, {}).get(name, [])
+                document.sets[key] = frozenset(entries)
+            return document.sets[key]
+
+    @classmethod
+    def load(cls, storage_path: str) -> Dict[str, List[str]]:
+        """Get a copy of a storage file's parsed JSON contents."""
+        with cls._lock:
+            return dict(cls._document(storage_path).data)
+
+    @classmethod
+    def update(cls, storage_path: str, data: Dict[str, List[str]]) -> None:
+        """Replace the cached contents of a storage file after it was written."""
+        key = os.path.abspath(storage_path)
+        with cls._lock:
+            document = cls._documents.get(key)
+            if document is None:
+                return
+            document.stamp = cls._stamp(key)
+            document.data = data
+            document.sets = {}
+
+    @classmethod
+    def merged(cls, layers: Tuple[FrozenSet[str], ...]) -> FrozenSet[str]:
+        """
+        Get the precompiled union of a stack of stopword layers.
+
+        Instances with the same layers (e.g. every processor of one document
+        type) share a single merged set, so lookups cost one hash probe no
+        matter how many layers are stacked. The most recently used
+        max_merged_stacks stacks are kept.
+
+        Args:
+            layers: Stopword sets in stacking order (base, custom, overlay...)
+
+        Returns:
+            Frozen union of all layers
+        """
+        with cls._lock:
+            merged = cls._merged.get(layers)
+            if merged is not None:
+                cls._merged.move_to_end(layers)
+                return merged
+
+            merged = frozenset().union(*layers)
+            cls._merged[layers] = merged
+            if len(cls._merged) > cls.max_merged_stacks:
+                cls._merged.popitem(last=False)
+            return merged
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop every cached list (mainly useful in tests and long-lived tools)."""
+        with cls._lock:
+            cls._base.clear()
+            cls._snapshot = None
+            cls._documents.clear()
+            cls._merged.clear()
+
+    @classmethod
+    def _document(cls, storage_path: str) -> _CachedDocument:
+        """Return the cached entry for a file, (re)loading it if it changed on disk."""
+        key = os.path.abspath(storage_path)
+        stamp = cls._stamp(key)
+        document = cls._documents.get(key)
+
+        if document is None:
+            document = _CachedDocument(stamp, cls._parse(key))
+            cls._documents[key] = document
+        elif document.stamp != stamp:
+            document.stamp = stamp
+            document.data = cls._parse(key)
+            document.sets = {}
+
+        return document
+
+    @classmethod
+    def _snapshot_languages(cls) -> Dict[str, List[str]]:
+        """
+        Get the snapshot's lists per language, reading the file on first use.
+
+        Raises:
+            ValueError: If the snapshot version is not supported
+        """
+        if cls._snapshot is None:
+            snapshot = {}
+            if cls.snapshot_path and os.path.exists(cls.snapshot_path):
+                with open(cls.snapshot_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != SNAPSHOT_VERSION:
+                    raise ValueError(f"Unsupported stopword snapshot version {data.get('version')!r}")
+                snapshot = data["languages"]
+            cls._snapshot = snapshot
+        return cls._snapshot
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _parse(path: str) -> Dict[str, List[str]]:
+        with open(path, "r") as f:
+            data = json.load(f)
+        # Earlier files kept sections (dicts) next to the language lists
+        legacy = {key: value for key, value in data.items()
+                  if key != SECTIONS_KEY and isinstance(value, dict)}
+        if legacy:
+            data = {key: value for key, value in data.items() if key not in legacy}
+            data[SECTIONS_KEY] = {**legacy, **data.get(SECTIONS_KEY, {})}
+        return data
@@ -0,0 +1,293 @@
+"""
+Stopword Suggester - Proposes domain stopwords from corpus statistics
+Finds terms that occur in most documents of a type in one bounded-memory pass
+"""
+
+import heapq
+import json
+import math
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from atomic_write import write_json
+from custom_stopwords import CustomStopwords, DEFAULT_CHUNK_SIZE, analyze
+from tokenization import TokenizerRegistry
+
+
+class CountMinSketch:
+    """
+    Approximate counter for arbitrarily many distinct items in fixed memory.
+
+    Estimates never undercount; with width w and depth d they overcount by
+    at most e/w of the total count with probability 1 - e^-d.
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            width: Counters per row
+            depth: Number of rows (independent hash functions)
+        """
+        self.width = width
+        self.depth = depth
+        self._rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+
+    def _columns(self, item: str) -> List[int]:
+        # Derive the row hashes from one hash (Kirsch-Mitzenmacher)
+        value = hash(item)
+        first, step = value & 0xFFFFFFFF, (value >> 32) | 1
+        return [(first + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> None:
+        """Add count occurrences of item."""
+        for row, column in zip(self._rows, self._columns(item)):
+            row[column] += count
+
+    def estimate(self, item: str) -> int:
+        """Get an upper bound on the number of occurrences of item."""
+        return min(row[column] for row, column in zip(self._rows, self._columns(item)))
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters summary: tracks the most frequent items of a
+    stream with a fixed number of counters.
+
+    Any item occurring more than total / capacity times is guaranteed to be
+    tracked, and each tracked count overestimates by at most its error.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize an empty summary.
+
+        Args:
+            capacity: Number of items tracked at once
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        # One (count, item) entry per tracked item; counts may be stale (too
+        # low) and are refreshed lazily when the entry reaches the top
+        self._heap: List = []
+
+    def add(self, item: str) -> None:
+        """Count one occurrence of item."""
+        counts = self.counts
+        if item in counts:
+            counts[item] += 1
+            return
+
+        if len(counts) < self.capacity:
+            counts[item] = 1
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (1, item))
+            return
+
+        # Replace the item with the smallest count, inheriting that count as error
+        heap = self._heap
+        while True:
+            count, victim = heap[0]
+            current = counts[victim]
+            if current == count:
+                break
+            heapq.heapreplace(heap, (current, victim))
+
+        del counts[victim]
+        del self.errors[victim]
+        counts[item] = count + 1
+        self.errors[item] = count
+        heapq.heapreplace(heap, (count + 1, item))
+
+
+class Suggestion(NamedTuple):
+    """A proposed stopword with the statistics behind it."""
+
+    word: str
+    document_ratio: float
+    idf: float
+
+
+class _TypeStatistics:
+    """Sketches of the document frequencies of one document type."""
+
+    __slots__ = ("documents", "frequent", "sketch")
+
+    def __init__(self, capacity: int, width: int, depth: int):
+        self.documents = 0
+        self.frequent = SpaceSaving(capacity)
+        self.sketch = CountMinSketch(width, depth)
+
+    def document_frequency(self, word: str) -> int:
+        # Both structures only overestimate, so the smaller is the better bound
+        return min(self.frequent.counts.get(word, self.documents), self.sketch.estimate(word))
+
+
+class StopwordSuggester:
+    """
+    Streaming analyzer that proposes stopwords per document type.
+
+    Each document contributes its distinct non-stopword tokens once, so the
+    counts are document frequencies. A Space-Saving summary keeps the terms
+    with the highest DF and a Count-Min sketch bounds their estimates.
+    Memory depends on capacity, width and depth only, never on the corpus
+    vocabulary, so corpora of tens of millions of documents fit.
+
+    Suggestions are terms with a high DF (low IDF): present in at least
+    min_document_ratio of the type's documents. write_overlay() saves them
+    for review, and load_overlay() turns a reviewed file into a
+    CustomStopwords overlay.
+    """
+
+    def __init__(self, capacity: int = 1000, width: int = 1 << 16, depth: int = 4):
+        """
+        Initialize an empty suggester.
+
+        Args:
+            capacity: Candidate terms tracked per document type
+            width: Count-Min sketch counters per row
+            depth: Count-Min sketch rows
+        """
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self._types: Dict[str, _TypeStatistics] = {}
+
+    def add_document(self, doc_type: str, terms: Iterable[str]) -> None:
+        """
+        Count one document.
+
+        Args:
+            doc_type: Document type of the document
+            terms: The document's distinct terms
+        """
+        statistics = self._types.get(doc_type)
+        if statistics is None:
+            statistics = self._types[doc_type] = _TypeStatistics(self.capacity, self.width, self.depth)
+
+        statistics.documents += 1
+        add_frequent = statistics.frequent.add
+        add_sketch = statistics.sketch.add
+        for term in terms:
+            add_frequent(term)
+            add_sketch(term)
+
+    def scan(self, documents: Iterable, doc_type: str,
+             stopwords_plugin: Optional[CustomStopwords] = None, files: bool = False,
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Count a corpus of one document type in a single pass.
+
+        Text is split with the tokenizer chosen for doc_type in TokenizerRegistry.
+
+        Args:
+            documents: Texts, or file paths if files is True
+            doc_type: Document type of every document
+            stopwords_plugin: Stopwords already in use, which are never
+                suggested (default: the registered processor's stopwords
+                for doc_type)
+            files: Treat documents as file paths, read in chunks
+            chunk_size: Characters per chunk when reading files
+
+        Returns:
+            Number of documents counted
+        """
+        if stopwords_plugin is None:
+            from document_processors import ProcessorRegistry
+
+            stopwords_plugin = ProcessorRegistry.get_processor(doc_type).stopwords_plugin
+
+        tokenizer = TokenizerRegistry.for_doc_type(doc_type)
+        count = 0
+        for document in documents:
+            if files:
+                with open(document, "r", encoding="utf-8") as f:
+                    analysis = analyze(f, stopwords_plugin, keep_tokens=False, chunk_size=chunk_size,
+                                       tokenizer=tokenizer)
+            else:
+                analysis = analyze(document, stopwords_plugin, keep_tokens=False, tokenizer=tokenizer)
+            self.add_document(doc_type, analysis.distinct)
+            count += 1
+
+        return count
+
+    def documents(self, doc_type: str) -> int:
+        """Number of documents counted for a type."""
+        statistics = self._types.get(doc_type)
+        return statistics.documents if statistics is not None else 0
+
+    def suggest(self, doc_type: str, n: int = 20, min_document_ratio: float = 0.3) -> List[Suggestion]:
+        """
+        Propose stopwords for a document type.
+
+        Args:
+            doc_type: Document type
+            n: Maximum number of suggestions
+            min_document_ratio: Minimum share of the type's documents a
+                term must occur in
+
+        Returns:
+            Suggestions, most widespread first
+        """
+        statistics = self._types.get(doc_type)
+        if statistics is None:
+            return []
+
+        documents = statistics.documents
+        suggestions = []
+        for word in statistics.frequent.counts:
+            df = statistics.document_frequency(word)
+            if df >= min_document_ratio * documents:
+                suggestions.append(Suggestion(
+                    word=word,
+                    document_ratio=round(df / documents, 4),
+                    idf=round(math.log((1 + documents) / (1 + df)) + 1, 4),
+                ))
+
+        suggestions.sort(key=lambda suggestion: (-suggestion.document_ratio, suggestion.word))
+        return suggestions[:n]
+
+    def write_overlay(self, path: str, n: int = 20, min_document_ratio: float = 0.3) -> Dict:
+        """
+        Save the suggestions of every document type as a reviewable JSON file.
+
+        The file maps each document type to {word: document ratio}, most
+        widespread first; delete the lines of words that should stay.
+
+        Args:
+            path: Output file path
+            n: Maximum suggestions per type
+            min_document_ratio: See suggest()
+
+        Returns:
+            The data written
+        """
+        data = {
+            doc_type: {
+                suggestion.word: suggestion.document_ratio
+                for suggestion in self.suggest(doc_type, n, min_document_ratio)
+            }
+            for doc_type in self._types
+        }
+
+        write_json(path, data, indent=4, ensure_ascii=False)
+        return data
+
+
+def load_overlay(path: str, doc_type: str) -> List[str]:
+    """
+    Read the reviewed suggestions for one document type.
+
+    Use the result as CustomStopwords(overlay=...) or with add_overlay().
+
+    Args:
+        path: File written by StopwordSuggester.write_overlay()
+        doc_type: Document type
+
+    Returns:
+        Stopwords for the type (empty if the file has none for it)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return list(json.load(f).get(doc_type, {}))
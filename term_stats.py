@@ -0,0 +1,165 @@
+"""
+Term Statistics - Incremental document frequencies and TF-IDF scoring
+Lets NLPPipeline rank terms per document type without a second pass over the corpus
+"""
+
+import json
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from atomic_write import write_json
+
+
+class DocumentFrequencies:
+    """
+    Per-document-type document frequency (DF) counts.
+
+    Each added document costs one counter increment per distinct term, so
+    DF, IDF and TF-IDF are always current without re-reading documents.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self._documents: Counter = Counter()
+        self._df: Dict[str, Counter] = {}
+
+    def add(self, doc_type: str, terms: Iterable[str]) -> None:
+        """
+        Count one document.
+
+        Args:
+            doc_type: Document type the document was processed as
+            terms: The document's distinct terms
+        """
+        self._documents[doc_type] += 1
+
+        df = self._df.get(doc_type)
+        if df is None:
+            df = self._df[doc_type] = Counter()
+        df.update(terms)
+
+    def documents(self, doc_type: Optional[str] = None) -> int:
+        """Number of documents counted for a type (all types if None)."""
+        if doc_type is None:
+            return sum(self._documents.values())
+        return self._documents[doc_type]
+
+    def doc_types(self) -> List[str]:
+        """Document types with at least one counted document."""
+        return list(self._documents)
+
+    def df(self, term: str, doc_type: Optional[str] = None) -> int:
+        """Number of documents of a type (all types if None) containing term."""
+        if doc_type is None:
+            return sum(df[term] for df in self._df.values())
+        return self._df.get(doc_type, Counter())[term]
+
+    def idf(self, term: str, doc_type: Optional[str] = None) -> float:
+        """
+        Smoothed inverse document frequency: ln((1 + N) / (1 + df)) + 1.
+
+        Unseen terms get the highest IDF and terms in every document get 1.
+        """
+        return math.log((1 + self.documents(doc_type)) / (1 + self.df(term, doc_type))) + 1
+
+    def top_terms(self, doc_type: Optional[str] = None, n: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get the terms found in the most documents.
+
+        Args:
+            doc_type: Document type (all types combined if None)
+            n: Number of terms to return
+
+        Returns:
+            List of (term, document frequency) tuples, most frequent first
+        """
+        if doc_type is None:
+            combined: Counter = Counter()
+            for df in self._df.values():
+                combined.update(df)
+            return combined.most_common(n)
+        return self._df.get(doc_type, Counter()).most_common(n)
+
+    def top_tfidf(self, term_counts: Mapping[str, int], doc_type: Optional[str] = None,
+                  n: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank a document's terms by TF-IDF.
+
+        Args:
+            term_counts: Occurrences of each term in the document
+            doc_type: Document type whose DF counts to use (all types if None)
+            n: Number of terms to return
+
+        Returns:
+            List of (term, tf * idf) tuples, highest score first
+        """
+        if doc_type is None:
+            documents = self.documents()
+            df = Counter()
+            for type_df in self._df.values():
+                df.update({term: type_df[term] for term in term_counts if term in type_df})
+        else:
+            documents = self._documents[doc_type]
+            df = self._df.get(doc_type, Counter())
+
+        scores = Counter({
+            term: count * (math.log((1 + documents) / (1 + df[term])) + 1)
+            for term, count in term_counts.items()
+        })
+        return [(term, round(score, 4)) for term, score in scores.most_common(n)]
+
+    def clear(self) -> None:
+        """Drop all counts."""
+        self._documents.clear()
+        self._df.clear()
+
+    def to_dict(self) -> Dict:
+        """Get the statistics as a JSON-serializable dictionary."""
+        return {
+            "version": self.SNAPSHOT_VERSION,
+            "doc_types": {
+                doc_type: {"documents": documents, "df": dict(self._df.get(doc_type, {}))}
+                for doc_type, documents in self._documents.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DocumentFrequencies":
+        """
+        Rebuild statistics from to_dict() output.
+
+        Raises:
+            ValueError: If the snapshot version is not supported
+        """
+        if data.get("version") != cls.SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported term statistics snapshot version {data.get('version')!r}")
+
+        stats = cls()
+        for doc_type, entry in data["doc_types"].items():
+            stats._documents[doc_type] = entry["documents"]
+            stats._df[doc_type] = Counter(entry["df"])
+        return stats
+
+    def save(self, path: str) -> None:
+        """
+        Write a snapshot to a JSON file.
+
+        The file is replaced atomically, so a crash mid-write leaves the
+        previous snapshot intact.
+        """
+        write_json(path, self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentFrequencies":
+        """
+        Read a snapshot written by save().
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the snapshot version is not supported
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,59 @@
+"""
+Stopphrase Tests - Aho-Corasick phrase removal checked against a naive matcher
+Run with: python -m pytest test_stopphrases.py
+"""
+
+import random
+
+from stopphrases import PhraseMatcher
+
+
+def naive_remove(words, phrases):
+    """Remove every word covered by a phrase occurrence, trying each phrase at each position."""
+    covered = [False] * len(words)
+    for phrase in phrases:
+        sequence = phrase.split()
+        for start in range(len(words) - len(sequence) + 1):
+            if words[start:start + len(sequence)] == sequence:
+                covered[start:start + len(sequence)] = [True] * len(sequence)
+    return [word for word, hit in zip(words, covered) if not hit]
+
+
+def chunked_remove(matcher, words, cuts):
+    """Remove phrases by feeding the words to a PhraseStream in pieces split at cuts."""
+    stream = matcher.stream()
+    kept = []
+    for start, end in zip([0] + cuts, cuts + [len(words)]):
+        kept.extend(stream.feed(words[start:end]))
+    return kept + stream.close()
+
+
+def test_examples():
+    matcher = PhraseMatcher(["according to", "terms and conditions", "and"])
+    words = "see terms and conditions according to the terms".split()
+    assert matcher.remove(words) == ["see", "the", "terms"]
+    # A phrase split across chunks is still removed
+    assert chunked_remove(matcher, words, [2, 5]) == ["see", "the", "terms"]
+
+
+def test_overlapping_and_nested_phrases():
+    phrases = ["a b", "b c", "a b c d", "c"]
+    matcher = PhraseMatcher(phrases)
+    for text in ["a b c d", "a b x b c", "a a b c c", "x a b c x d"]:
+        words = text.split()
+        assert matcher.remove(words) == naive_remove(words, phrases)
+
+
+def test_random_against_naive_matcher():
+    rng = random.Random(0)
+    alphabet = "abcde"
+    for _ in range(300):
+        phrases = {" ".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                   for _ in range(rng.randint(1, 6))}
+        matcher = PhraseMatcher(phrases)
+        words = [rng.choice(alphabet + "xy") for _ in range(rng.randint(0, 40))]
+        expected = naive_remove(words, phrases)
+
+        assert matcher.remove(words) == expected
+        cuts = sorted(rng.sample(range(len(words) + 1), rng.randint(0, min(len(words) + 1, 6))))
+        assert chunked_remove(matcher, words, cuts) == expected
@@ -4,8 +4,53 @@ Handles processing of text files with custom stopword filtering
 """
 
 import os
-from typing import List, Dict
-from custom_stopwords import CustomStopwords, preprocess
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Dict, Iterator, Optional, Sequence, Tuple
+from custom_stopwords import CustomStopwords, analyze, iter_tokens, DEFAULT_CHUNK_SIZE
+from analysis_cache import AnalysisCache, CachedAnalysis
+from mmap_reader import analyze_mmap
+from tokenization import DEFAULT_TOKENIZER, Tokenizer
+from vocabulary import Vocabulary
+
+
+class ProcessResult(Mapping):
+    """
+    Compact, read-only result of processing one file.
+
+    Stores only the fields that were requested, in __slots__ rather than a
+    per-result dict, and supports read-only dict-style access
+    (result["tokens"], result.get("top_words"), "error" in result). It is
+    not a dict: use to_dict() to serialize it (e.g. with json.dumps), to
+    modify it, or where code checks isinstance(result, dict).
+    """
+
+    FIELDS = ("file", "original_text", "tokens", "token_ids", "token_count", "unique_tokens",
+              "top_words", "remove_stopwords", "error")
+    __slots__ = FIELDS
+
+    def __init__(self, **fields: Any):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self.FIELDS if hasattr(self, name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"ProcessResult({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict:
+        """Get the result as a plain dictionary."""
+        return dict(self.items())
 
 
 class TextProcessor:
@@ -14,48 +59,167 @@ class TextProcessor:
     Uses CustomStopwords plugin for stopword management.
     """
 
-    def __init__(self, stopwords_plugin: CustomStopwords = None):
+    # Fields process_file() can return, and those it returns when none are requested
+    RESULT_FIELDS = ("original_text", "tokens", "token_ids", "token_count", "unique_tokens",
+                     "top_words", "remove_stopwords")
+    DEFAULT_FIELDS = ("original_text", "tokens", "token_count", "unique_tokens", "remove_stopwords")
+
+    def __init__(self, stopwords_plugin: CustomStopwords = None,
+                 analysis_cache: Optional[AnalysisCache] = None,
+                 tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+                 vocabulary: Optional[Vocabulary] = None):
         """
         Initialize TextProcessor with optional custom stopwords plugin.
         
         Args:
             stopwords_plugin: CustomStopwords instance (creates default if None)
+            analysis_cache: Cache of file analyses shared by process_file and
+                get_word_frequency (creates a default-sized one if None;
+                pass AnalysisCache(max_bytes=0) to disable caching)
+            tokenizer: Tokenizer that splits text into words (default: the
+                \\b\\w+\\b words, with an ASCII fast path)
+            vocabulary: Token vocabulary for the "token_ids" result field
+                (default: a new, empty vocabulary)
         """
         self.stopwords_plugin = stopwords_plugin or CustomStopwords()
+        self.analysis_cache = analysis_cache if analysis_cache is not None else AnalysisCache()
+        self.tokenizer = tokenizer
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
 
-    def process_file(self, file_path: str, remove_stopwords: bool = True) -> Dict:
+    def process_file(self, file_path: str, remove_stopwords: bool = True,
+                     stream: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     fields: Optional[Sequence[str]] = None, top_n: int = 10,
+                     use_mmap: bool = False) -> ProcessResult:
         """
         Process a text file and remove/filter stopwords.
         
         Args:
             file_path: Path to the text file
             remove_stopwords: Whether to filter stopwords
+            stream: Read the file in chunks instead of all at once. The result
+                then has no "original_text" entry; tokens are unchanged.
+            chunk_size: Characters per chunk in streaming mode
+            fields: Result fields to include besides "file", any of
+                RESULT_FIELDS (default: DEFAULT_FIELDS). Leaving out
+                "original_text" and "tokens" keeps results small; "token_ids"
+                gives the tokens as an array('I') of IDs from self.vocabulary.
+            top_n: Number of (word, frequency) pairs for the "top_words" field
+            use_mmap: Memory-map the file and tokenize the mapped bytes directly
+                (bypasses the analysis cache; no "original_text" entry)
         
         Returns:
-            Dictionary with original text, tokens, and statistics
+            ProcessResult with the requested fields (original text, tokens,
+            and statistics by default)
         
         Raises:
             FileNotFoundError: If file doesn't exist
+            ValueError: If an unknown field is requested
         """
+        fields = self._check_fields(fields)
+
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            text = f.read()
+        if use_mmap or stream:
+            keep_tokens = "tokens" in fields or "token_ids" in fields
+            if use_mmap:
+                analysis = analyze_mmap(file_path, self.stopwords_plugin, remove_stopwords,
+                                        frequencies="top_words" in fields,
+                                        keep_tokens=keep_tokens, tokenizer=self.tokenizer)
+            else:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    analysis = analyze(f, self.stopwords_plugin, remove_stopwords,
+                                       frequencies="top_words" in fields,
+                                       keep_tokens=keep_tokens, chunk_size=chunk_size,
+                                       tokenizer=self.tokenizer)
+            text = None
+            tokens = analysis.tokens
+            token_count = analysis.token_count
+            unique_tokens = analysis.unique_count
+            frequencies = analysis.frequencies
+        else:
+            cached = self._analyze_file(file_path, remove_stopwords)
+            text = cached.text
+            tokens = cached.tokens
+            token_count = len(cached.tokens)
+            unique_tokens = len(cached.frequencies)
+            frequencies = cached.frequencies
 
-        tokens = preprocess(text, self.stopwords_plugin, remove_stopwords)
+        values = {"file": file_path}
+        for name in fields:
+            if name == "original_text":
+                if text is not None:
+                    values[name] = text
+            elif name == "tokens":
+                values[name] = list(tokens)
+            elif name == "token_ids":
+                values[name] = self.vocabulary.encode(tokens)
+            elif name == "token_count":
+                values[name] = token_count
+            elif name == "unique_tokens":
+                values[name] = unique_tokens
+            elif name == "top_words":
+                values[name] = frequencies.most_common(top_n)
+            elif name == "remove_stopwords":
+                values[name] = remove_stopwords
         
-        return {
-            "file": file_path,
-            "original_text": text,
-            "tokens": tokens,
-            "token_count": len(tokens),
-            "unique_tokens": len(set(tokens)),
-            "remove_stopwords": remove_stopwords
-        }
+        return ProcessResult(**values)
+
+    def _check_fields(self, fields: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        """Validate a requested result shape, defaulting to DEFAULT_FIELDS."""
+        if fields is None:
+            return self.DEFAULT_FIELDS
+
+        unknown = [name for name in fields if name not in self.RESULT_FIELDS and name != "file"]
+        if unknown:
+            available = ", ".join(self.RESULT_FIELDS)
+            raise ValueError(f"Unknown result field(s) {', '.join(unknown)}. Available: {available}")
+        return tuple(fields)
+
+    def _analyze_file(self, file_path: str, remove_stopwords: bool) -> CachedAnalysis:
+        """Get a file's analysis from the cache, reading and tokenizing it only on a miss."""
+        def analyze_text(text: str) -> CachedAnalysis:
+            analysis = analyze(text, self.stopwords_plugin, remove_stopwords, frequencies=True,
+                               tokenizer=self.tokenizer)
+            return CachedAnalysis(text, analysis.tokens, analysis.frequencies)
+
+        # The merged stopword set is rebuilt on every change, so together with
+        # the stopphrases, patterns and tokenizer it identifies what produced an entry
+        variant = (remove_stopwords, self.stopwords_plugin.get_all(),
+                   self.stopwords_plugin.custom_stopphrases, self.stopwords_plugin.custom_stoppatterns,
+                   self.tokenizer)
+        return self.analysis_cache.get_or_analyze(file_path, variant, analyze_text)
+
+    def iter_file_tokens(self, file_path: str, remove_stopwords: bool = True,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Lazily yield the tokens of a text file, reading it chunk by chunk.
+
+        Memory use stays bounded by the chunk size however large the file is.
+        
+        Args:
+            file_path: Path to the text file
+            remove_stopwords: Whether to filter stopwords
+            chunk_size: Characters to read at a time
+        
+        Yields:
+            Processed tokens, identical to those of process_file()
+        
+        Raises:
+            FileNotFoundError: If file doesn't exist
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            # Regex-equivalent tokenizers can use the lazy regex scan
+            tokenizer = None if self.tokenizer.matches_word_pattern else self.tokenizer
+            yield from iter_tokens(f, self.stopwords_plugin, remove_stopwords, chunk_size, tokenizer)
 
     def process_directory(self, directory: str, pattern: str = "*.txt", 
-                         remove_stopwords: bool = True) -> List[Dict]:
+                         remove_stopwords: bool = True, workers: Optional[int] = None,
+                         chunksize: int = 1, fields: Optional[Sequence[str]] = None,
+                         top_n: int = 10) -> List[ProcessResult]:
         """
         Process all text files in a directory.
         
@@ -63,27 +227,56 @@ class TextProcessor:
             directory: Path to directory
             pattern: File pattern to match (default: "*.txt")
             remove_stopwords: Whether to filter stopwords
+            workers: Number of worker processes (default: process files in
+                this process). Each worker receives a copy of this processor's
+                stopwords once, at startup.
+            chunksize: Files handed to a worker at a time
+            fields: Result fields to include for each file (see process_file)
+            top_n: Number of pairs for the "top_words" field
         
         Returns:
-            List of processing results for each file
+            List of processing results for each file, in sorted path order
         """
         import glob
         
-        results = []
-        files = glob.glob(os.path.join(directory, pattern))
+        files = sorted(glob.glob(os.path.join(directory, pattern)))
+        self._check_fields(fields)
         
-        for file_path in files:
-            try:
-                result = self.process_file(file_path, remove_stopwords)
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    "file": file_path,
-                    "error": str(e)
-                })
+        if not workers or workers <= 1:
+            return [self._process_file_safe(file_path, remove_stopwords, fields, top_n) for file_path in files]
         
+        count = len(files)
+        # Workers have their own copies of the vocabulary, so they return
+        # tokens and IDs are only assigned here
+        as_ids = fields is not None and "token_ids" in fields
+        worker_fields = ([name for name in fields if name != "token_ids"] + ["tokens"]
+                         if as_ids else fields)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            results = list(executor.map(_process_file_in_worker, files, [remove_stopwords] * count,
+                                        [worker_fields] * count, [top_n] * count,
+                                        chunksize=chunksize))
+        if as_ids:
+            results = [self._encode_tokens(result, fields) for result in results]
         return results
 
+    def _encode_tokens(self, result: ProcessResult, fields: Sequence[str]) -> ProcessResult:
+        """Give a worker's result the requested "token_ids" field, encoded with self.vocabulary."""
+        if "error" in result:
+            return result
+        values = result.to_dict()
+        tokens = values["tokens"] if "tokens" in fields else values.pop("tokens")
+        values["token_ids"] = self.vocabulary.encode(tokens)
+        return ProcessResult(**values)
+
+    def _process_file_safe(self, file_path: str, remove_stopwords: bool,
+                           fields: Optional[Sequence[str]] = None, top_n: int = 10) -> ProcessResult:
+        """Process a file, capturing any error in the result instead of raising."""
+        try:
+            return self.process_file(file_path, remove_stopwords, fields=fields, top_n=top_n)
+        except Exception as e:
+            return ProcessResult(file=file_path, error=str(e))
+
     def get_word_frequency(self, file_path: str, top_n: int = 10, 
                           remove_stopwords: bool = True) -> List[tuple]:
         """
@@ -99,8 +292,14 @@ class TextProcessor:
         """
         from collections import Counter
         
-        result = self.process_file(file_path, remove_stopwords)
-        word_counts = Counter(result["tokens"])
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        if os.path.getsize(file_path) <= self.analysis_cache.max_bytes:
+            return self._analyze_file(file_path, remove_stopwords).frequencies.most_common(top_n)
+        
+        # Too large to cache: count straight from the token stream instead
+        word_counts = Counter(self.iter_file_tokens(file_path, remove_stopwords))
         
         return word_counts.most_common(top_n)
 
@@ -121,5 +320,25 @@ class TextProcessor:
             "total_stopwords": len(all_stopwords),
             "base_stopwords": len(self.stopwords_plugin.base_stopwords),
             "custom_stopwords": len(custom_stopwords),
-            "custom_words_list": sorted(list(custom_stopwords))
+            "overlay_stopwords": len(self.stopwords_plugin.overlay_stopwords),
+            "custom_stopphrases": len(self.stopwords_plugin.custom_stopphrases),
+            "custom_stoppatterns": len(self.stopwords_plugin.custom_stoppatterns),
+            "custom_words_list": sorted(list(custom_stopwords)),
+            "decision_cache": self.stopwords_plugin.decision_cache.stats()
         }
+
+
+# Processor used inside worker processes started by process_directory()
+_worker_processor: Optional[TextProcessor] = None
+
+
+def _init_worker(processor: TextProcessor) -> None:
+    """Install the processor (and its stopword set) once per worker process."""
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _process_file_in_worker(file_path: str, remove_stopwords: bool,
+                            fields: Optional[Sequence[str]], top_n: int) -> ProcessResult:
+    """Process one file in a worker process."""
+    return _worker_processor._process_file_safe(file_path, remove_stopwords, fields, top_n)
@@ -0,0 +1,302 @@
+"""
+Token Counts - Frequency and unique counting over integer token IDs
+Uses NumPy (unique/argpartition) when it is installed, plain Python otherwise
+"""
+
+import importlib.util
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from vocabulary import Vocabulary
+
+# NumPy is optional and only imported once the numpy backend is first used,
+# so importing this module stays cheap for short-lived processes
+np = None
+
+BACKENDS = ("python", "numpy")
+
+# Backend used when none is requested
+DEFAULT_BACKEND = "numpy" if importlib.util.find_spec("numpy") is not None else "python"
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Validate a counting backend name, defaulting to DEFAULT_BACKEND.
+
+    Raises:
+        ValueError: If the backend is unknown, or is "numpy" and NumPy
+            is not installed
+    """
+    if backend is None:
+        backend = DEFAULT_BACKEND
+    elif backend not in BACKENDS:
+        available = ", ".join(BACKENDS)
+        raise ValueError(f"Unknown counting backend '{backend}'. Available: {available}")
+    if backend == "numpy":
+        _import_numpy()
+    return backend
+
+
+def _import_numpy() -> None:
+    """Import NumPy into this module on first use of the numpy backend."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ValueError("The 'numpy' counting backend requires NumPy to be installed") from None
+        np = numpy
+
+
+class IdFrequencies(Mapping):
+    """
+    Token frequencies of one document, counted on token IDs with NumPy.
+
+    Behaves like the Counter returned by the Python backend for reading:
+    mapping access by token, len() for the number of distinct tokens, and
+    most_common(n), which orders ties by first occurrence just like
+    Counter. Tokens are only decoded for the entries that are returned.
+    """
+
+    __slots__ = ("_vocabulary", "_ids", "_counts", "_first")
+
+    def __init__(self, token_ids, vocabulary: Vocabulary):
+        """
+        Count a document's token IDs.
+
+        Args:
+            token_ids: Token IDs of the document, e.g. an array('I')
+            vocabulary: Vocabulary the IDs come from
+        """
+        _import_numpy()
+        # Sorted distinct IDs with their counts and first positions in the document
+        self._ids, self._first, self._counts = np.unique(
+            _as_numpy(token_ids), return_index=True, return_counts=True)
+        self._vocabulary = vocabulary
+
+    def __getitem__(self, token: str) -> int:
+        token_id = self._vocabulary.id_of(token)
+        if token_id is not None:
+            index = np.searchsorted(self._ids, token_id)
+            if index < len(self._ids) and self._ids[index] == token_id:
+                return int(self._counts[index])
+        raise KeyError(token)
+
+    def __iter__(self) -> Iterator[str]:
+        token = self._vocabulary.token
+        return (token(token_id) for token_id in self._ids[np.argsort(self._first)].tolist())
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def ids(self):
+        """Distinct token IDs, ascending."""
+        return self._ids
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Get the n most frequent tokens and their counts, most frequent first.
+
+        Args:
+            n: Number of entries (default: all)
+
+        Returns:
+            List of (token, count) tuples
+        """
+        counts = self._counts
+        candidates = np.arange(len(counts))
+
+        if n is not None and n < len(counts):
+            if n <= 0:
+                return []
+            # Everything tied with the n-th largest count is a candidate, so ties
+            # can still be ordered by first occurrence
+            threshold = counts[np.argpartition(-counts, n - 1)[n - 1]]
+            candidates = np.flatnonzero(counts >= threshold)
+
+        order = candidates[np.lexsort((self._first[candidates], -counts[candidates]))][:n]
+        token = self._vocabulary.token
+        return [(token(token_id), count)
+                for token_id, count in zip(self._ids[order].tolist(), counts[order].tolist())]
+
+
+def _as_numpy(token_ids):
+    """View an array('I') as a NumPy array without copying; convert anything else."""
+    if isinstance(token_ids, array):
+        return np.frombuffer(token_ids, dtype=np.uint32) if token_ids else np.zeros(0, np.uint32)
+    return np.asarray(token_ids, dtype=np.uint32)
+
+
+def unique_ids(token_ids):
+    """Get the distinct IDs of a document as an ascending NumPy array."""
+    return np.unique(_as_numpy(token_ids))
+
+
+def count_ids(token_ids, vocabulary: Vocabulary, frequencies: bool = False,
+              backend: Optional[str] = None):
+    """
+    Count the distinct tokens, and optionally their frequencies, of one document.
+
+    Args:
+        token_ids: Token IDs of the document, e.g. an array('I')
+        vocabulary: Vocabulary the IDs come from
+        frequencies: Whether to return per-token frequencies as well
+        backend: "numpy" or "python" (default: DEFAULT_BACKEND)
+
+    Returns:
+        (unique_count, frequencies) where frequencies is None unless
+        requested; an IdFrequencies with NumPy, a Counter otherwise
+    """
+    if resolve_backend(backend) == "numpy":
+        if frequencies:
+            counts = IdFrequencies(token_ids, vocabulary)
+            return len(counts), counts
+        return len(unique_ids(token_ids)), None
+
+    if frequencies:
+        token = vocabulary.token
+        counts = Counter({token(token_id): count for token_id, count in Counter(token_ids).items()})
+        return len(counts), counts
+    return len(set(token_ids)), None
+
+
+class DocumentTermMatrix(NamedTuple):
+    """
+    Token counts of many documents in compressed sparse row (CSR) form.
+
+    Row i holds document i: its distinct token IDs are
+    indices[indptr[i]:indptr[i + 1]] (ascending) and their counts are the
+    matching slice of data. Columns are IDs of the vocabulary.
+    """
+
+    indptr: Sequence[int]
+    indices: Sequence[int]
+    data: Sequence[int]
+    shape: Tuple[int, int]
+    vocabulary: Optional[Vocabulary] = None
+
+    def to_scipy(self):
+        """Get the matrix as a scipy.sparse.csr_matrix (requires SciPy)."""
+        from scipy.sparse import csr_matrix
+
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+
+class MatrixBuilder:
+    """
+    Appends documents, or whole matrices, as rows of a DocumentTermMatrix.
+
+    Rows are written straight into flat array('q'/'I') buffers, so memory
+    grows with the number of non-zero entries only.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Initialize an empty matrix.
+
+        Args:
+            backend: "numpy" or "python" (default: DEFAULT_BACKEND)
+        """
+        self.backend = resolve_backend(backend)
+        self.indptr = array("q", [0])
+        self.indices = array("I")
+        self.data = array("q")
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def add_document(self, token_ids) -> None:
+        """Append one document's token IDs as a row."""
+        if self.backend == "numpy":
+            columns, counts = np.unique(_as_numpy(token_ids), return_counts=True)
+            self.indices.frombytes(columns.astype(np.uint32).tobytes())
+            self.data.frombytes(counts.astype(np.int64).tobytes())
+        else:
+            counts = Counter(token_ids)
+            columns = sorted(counts)
+            self.indices.extend(columns)
+            self.data.extend(map(counts.__getitem__, columns))
+        self.indptr.append(len(self.indices))
+
+    def add_matrix(self, matrix: DocumentTermMatrix, column_map=None) -> None:
+        """
+        Append the rows of another matrix.
+
+        Args:
+            matrix: Matrix whose rows to append
+            column_map: Sequence mapping the matrix's column IDs to this
+                matrix's columns, e.g. from a shard's own vocabulary to a
+                shared one (default: columns are kept as they are)
+        """
+        offset = len(self.indices)
+
+        if self.backend == "numpy":
+            indptr = np.asarray(matrix.indptr, dtype=np.int64)
+            indices = np.asarray(matrix.indices, dtype=np.uint32)
+            data = np.asarray(matrix.data, dtype=np.int64)
+            if column_map is not None:
+                indices = _as_numpy(column_map)[indices]
+                # Remapped columns are no longer ascending within rows
+                rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+                order = np.lexsort((indices, rows))
+                indices, data = indices[order], data[order]
+            self.indices.frombytes(indices.tobytes())
+            self.data.frombytes(data.tobytes())
+            self.indptr.frombytes((indptr[1:] - indptr[0] + offset).tobytes())
+            return
+
+        indptr = matrix.indptr
+        for row in range(len(indptr) - 1):
+            start, end = indptr[row], indptr[row + 1]
+            columns = matrix.indices[start:end]
+            counts = matrix.data[start:end]
+            if column_map is not None:
+                pairs = sorted(zip(map(column_map.__getitem__, columns), counts))
+                columns = [column for column, _ in pairs]
+                counts = [count for _, count in pairs]
+            self.indices.extend(columns)
+            self.data.extend(counts)
+            self.indptr.append(len(self.indices))
+
+    def build(self, vocabulary: Vocabulary) -> DocumentTermMatrix:
+        """
+        Get the rows added so far as a matrix over the given vocabulary.
+
+        Call it once all rows are added: with NumPy the matrix is a view
+        of the builder's buffers, which can then no longer grow.
+
+        Returns:
+            DocumentTermMatrix with NumPy arrays (NumPy backend, sharing the
+            builder's buffers) or array module arrays (Python backend)
+        """
+        shape = (len(self), len(vocabulary))
+        if self.backend == "numpy":
+            return DocumentTermMatrix(np.frombuffer(self.indptr, dtype=np.int64),
+                                      _as_numpy(self.indices),
+                                      np.frombuffer(self.data, dtype=np.int64) if self.data else np.zeros(0, np.int64),
+                                      shape, vocabulary)
+        return DocumentTermMatrix(self.indptr, self.indices, self.data, shape, vocabulary)
+
+
+def document_term_matrix(documents: Iterable, vocabulary: Vocabulary,
+                         backend: Optional[str] = None) -> DocumentTermMatrix:
+    """
+    Count the token IDs of many documents into one sparse matrix.
+
+    Args:
+        documents: Token ID sequences, one per document (e.g. the
+            "token_ids" of as_ids results)
+        vocabulary: Vocabulary the IDs come from; it sets the column count
+        backend: "numpy" or "python" (default: DEFAULT_BACKEND)
+
+    Returns:
+        DocumentTermMatrix with NumPy arrays (NumPy backend) or array
+        module arrays (Python backend)
+    """
+    builder = MatrixBuilder(backend)
+    for token_ids in documents:
+        builder.add_document(token_ids)
+    return builder.build(vocabulary)
@@ -0,0 +1,168 @@
+"""
+Tokenizers - Pluggable word tokenizers for the stopword pipeline
+Provides the precompiled default, an ASCII fast path, and per-document-type registration
+"""
+
+import re
+from typing import Dict, List
+
+# The word pattern every built-in tokenizer reproduces
+WORD_PATTERN = re.compile(r"\b\w+\b")
+
+# Maps every ASCII character that \w does not match to a space, so that for
+# pure-ASCII text translate() + split() yields exactly the \b\w+\b words
+_ASCII_NON_WORD = str.maketrans({
+    chr(code): " " for code in range(128)
+    if not (chr(code).isalnum() or chr(code) == "_")
+})
+
+
+class Tokenizer:
+    """
+    Splits text into lowercase word tokens.
+
+    Subclasses implement words(), which receives already-lowercased text.
+    Streaming readers call it once per chunk, and chunks are cut on
+    whitespace, so a tokenizer must never produce a token that spans
+    whitespace.
+    """
+
+    name = "base"
+    # True if words() returns exactly WORD_PATTERN.findall() for any text,
+    # which lets readers use equivalent byte-level fast paths
+    matches_word_pattern = False
+
+    def words(self, lowered: str) -> List[str]:
+        """
+        Split lowercased text into words.
+
+        Args:
+            lowered: Lowercased text
+
+        Returns:
+            List of words
+        """
+        raise NotImplementedError
+
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercase text and split it into words."""
+        return self.words(text.lower())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class RegexTokenizer(Tokenizer):
+    """The \\b\\w+\\b word regex, compiled once."""
+
+    name = "regex"
+    matches_word_pattern = True
+
+    def words(self, lowered: str) -> List[str]:
+        return WORD_PATTERN.findall(lowered)
+
+
+class DefaultTokenizer(Tokenizer):
+    """
+    Same words as RegexTokenizer, faster on ASCII.
+
+    Pure-ASCII text is split with str.translate + str.split, which gives
+    exactly the regex's words; other text goes through the compiled regex.
+    """
+
+    name = "default"
+    matches_word_pattern = True
+
+    def words(self, lowered: str) -> List[str]:
+        if lowered.isascii():
+            return lowered.translate(_ASCII_NON_WORD).split()
+        return WORD_PATTERN.findall(lowered)
+
+
+class AsciiTokenizer(Tokenizer):
+    """
+    translate + split only, for corpora known to be ASCII (e.g. source code).
+
+    ASCII text gets the regex's words. Non-ASCII characters are not
+    checked and always count as word characters, so non-ASCII punctuation
+    does not separate words.
+    """
+
+    name = "ascii"
+
+    def words(self, lowered: str) -> List[str]:
+        return lowered.translate(_ASCII_NON_WORD).split()
+
+
+DEFAULT_TOKENIZER = DefaultTokenizer()
+
+
+class TokenizerRegistry:
+    """Registry of named tokenizers and of the tokenizer each document type uses"""
+
+    _tokenizers: Dict[str, Tokenizer] = {
+        "default": DEFAULT_TOKENIZER,
+        "regex": RegexTokenizer(),
+        "ascii": AsciiTokenizer(),
+    }
+
+    # Document types without an entry use "default"
+    _doc_types: Dict[str, str] = {}
+
+    @classmethod
+    def get_tokenizer(cls, name: str) -> Tokenizer:
+        """
+        Get a registered tokenizer.
+
+        Args:
+            name: Tokenizer name ('default', 'regex', 'ascii' or a registered one)
+
+        Returns:
+            Tokenizer instance
+
+        Raises:
+            ValueError: If the name is not registered
+        """
+        if name not in cls._tokenizers:
+            available = ", ".join(cls._tokenizers.keys())
+            raise ValueError(f"Unknown tokenizer '{name}'. Available: {available}")
+
+        return cls._tokenizers[name]
+
+    @classmethod
+    def register_tokenizer(cls, name: str, tokenizer: Tokenizer):
+        """
+        Register a custom tokenizer.
+
+        Args:
+            name: Name of the tokenizer
+            tokenizer: Tokenizer instance
+        """
+        cls._tokenizers[name] = tokenizer
+
+    @classmethod
+    def list_tokenizers(cls):
+        """Get list of registered tokenizer names"""
+        return list(cls._tokenizers.keys())
+
+    @classmethod
+    def set_doc_type_tokenizer(cls, doc_type: str, name: str):
+        """
+        Choose the tokenizer for a document type's processors.
+
+        Applies to processors created afterwards.
+
+        Args:
+            doc_type: Name of the document type
+            name: Name of a registered tokenizer
+
+        Raises:
+            ValueError: If the tokenizer is not registered
+        """
+        cls.get_tokenizer(name)
+        cls._doc_types[doc_type] = name
+
+    @classmethod
+    def for_doc_type(cls, doc_type: str) -> Tokenizer:
+        """Get the tokenizer chosen for a document type"""
+        return cls.get_tokenizer(cls._doc_types.get(doc_type, "default"))
@@ -0,0 +1,94 @@
+"""
+Vocabulary - Shared token interning with dense integer IDs
+Lets the pipeline store and count documents as compact array('I') ID sequences
+"""
+
+import sys
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class Vocabulary:
+    """
+    Append-only mapping between tokens and dense integer IDs.
+
+    Each distinct token is stored once (interned) and gets the next free ID.
+    Documents encoded as array('I') take 4 bytes per token instead of a list
+    slot plus a separate str object, and counting them hashes small ints
+    rather than strings.
+    """
+
+    def __init__(self, tokens: Iterable[str] = ()):
+        """
+        Initialize the vocabulary.
+
+        Args:
+            tokens: Tokens to assign the first IDs to, in order
+        """
+        self._ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        self._lock = threading.Lock()
+        self.add(tokens)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the tokens in ID order."""
+        return iter(self._tokens)
+
+    def add(self, tokens: Iterable[str]) -> None:
+        """Assign IDs to any tokens not yet in the vocabulary."""
+        with self._lock:
+            for token in tokens:
+                if token not in self._ids:
+                    token = sys.intern(token)
+                    self._ids[token] = len(self._tokens)
+                    self._tokens.append(token)
+
+    def id_of(self, token: str) -> Optional[int]:
+        """Get a token's ID, or None if it has none."""
+        return self._ids.get(token)
+
+    def token(self, token_id: int) -> str:
+        """Get the token with the given ID."""
+        return self._tokens[token_id]
+
+    def encode(self, tokens: List[str]) -> array:
+        """
+        Encode tokens as IDs, assigning new IDs to unseen tokens.
+
+        Args:
+            tokens: Tokens to encode
+
+        Returns:
+            array('I') of token IDs
+        """
+        ids = self._ids
+        missing = set(tokens).difference(ids)
+        if missing:
+            # Sorted so that IDs don't depend on set iteration order
+            self.add(sorted(missing))
+        return array("I", map(ids.__getitem__, tokens))
+
+    def decode(self, token_ids: Iterable[int]) -> List[str]:
+        """
+        Decode IDs back into tokens for display.
+
+        Args:
+            token_ids: Token IDs, e.g. an array('I') from encode()
+
+        Returns:
+            List of tokens
+        """
+        return list(map(self._tokens.__getitem__, token_ids))
+
+    def __getstate__(self):
+        return {"tokens": self._tokens}
+
+    def __setstate__(self, state):
+        self.__init__(state["tokens"])